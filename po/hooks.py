@@ -79,7 +79,13 @@ jinja = {
 
 doctype_list = [
 	"User PO Limit",
-	"PO Limit Increase Request"
+	"PO Limit Increase Request",
+	"PO Limit Audit Log",
+	"PO Monthly Spend",
+	"PO Limit Alert",
+	"PO Usage Shard",
+	"PO Limit Auto Approval Rule",
+	"PO Usage Ledger Entry"
 ]
 
 # Integration Setup
@@ -131,34 +137,49 @@ doctype_list = [
 doc_events = {
 	"Purchase Order": {
 		"validate": "po.po_limiter.po_validation.validate_po_limits",
-		"on_submit": "po.po_limiter.po_validation.validate_po_limits",
-		"on_cancel": "po.po_limiter.po_validation.update_monthly_usage_on_po_cancel"
+		"on_submit": [
+			"po.po_limiter.usage_ledger.record_submit",
+			"po.po_limiter.po_validation.validate_po_limits",
+			"po.po_limiter.spend.update_spend_on_submit",
+			"po.po_limiter.limit_snapshot.clear_snapshot_on_usage_change"
+		],
+		"on_cancel": [
+			"po.po_limiter.usage_ledger.record_cancel",
+			"po.po_limiter.po_validation.update_monthly_usage_on_po_cancel",
+			"po.po_limiter.spend.update_spend_on_cancel",
+			"po.po_limiter.limit_snapshot.clear_snapshot_on_usage_change"
+		]
+	},
+	"User PO Limit": {
+		"on_update": "po.po_limiter.limit_snapshot.clear_snapshot_on_limit_change",
+		"on_trash": "po.po_limiter.limit_snapshot.clear_snapshot_on_limit_change"
 	},
 	"User": {
-		"after_insert": "po.po_limiter.user_hooks.create_default_po_limit"
+		"after_insert": "po.po_limiter.user_hooks.create_default_po_limit",
+		"on_trash": "po.po_limiter.user_hooks.forget_pending_user"
+	},
+	"Fiscal Year": {
+		"on_update": "po.po_limiter.fiscal_periods.clear_period_cache",
+		"on_trash": "po.po_limiter.fiscal_periods.clear_period_cache"
 	}
 }
 
 # Scheduled Tasks
 # ---------------
 
-# scheduler_events = {
-# 	"all": [
-# 		"po.tasks.all"
-# 	],
-# 	"daily": [
-# 		"po.tasks.daily"
-# 	],
-# 	"hourly": [
-# 		"po.tasks.hourly"
-# 	],
-# 	"weekly": [
-# 		"po.tasks.weekly"
-# 	],
-# 	"monthly": [
-# 		"po.tasks.monthly"
-# 	],
-# }
+scheduler_events = {
+	"all": [
+		"po.po_limiter.user_hooks.provision_pending_users",
+		"po.po_limiter.spend.fold_pending_spend"
+	],
+	"hourly": [
+		"po.po_limiter.alerts.send_limit_alerts",
+		"po.po_limiter.auto_approval.process_pending_requests"
+	],
+	"monthly": [
+		"po.po_limiter.audit.archive_audit_log"
+	]
+}
 
 # Testing
 # -------
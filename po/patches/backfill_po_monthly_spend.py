@@ -0,0 +1,18 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+import frappe
+
+from po.po_limiter.spend import rebuild_monthly_spend
+
+def execute():
+	"""
+	Backfill the PO Monthly Spend rollup from existing submitted Purchase Orders.
+	"""
+	print("Backfilling PO Monthly Spend rollup...")
+
+	frappe.reload_doc("po_limiter", "doctype", "po_monthly_spend")
+	rebuild_monthly_spend()
+
+	count = frappe.db.count("PO Monthly Spend")
+	print(f"Created {count} PO Monthly Spend rows")
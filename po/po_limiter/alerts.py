@@ -0,0 +1,137 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+import frappe
+from frappe import _
+from frappe.desk.doctype.notification_log.notification_log import enqueue_create_notification
+from frappe.utils import cint, flt, get_first_day, now, today
+
+DEFAULT_ALERT_THRESHOLDS = (80, 95)
+
+# Maximum number of users listed in the MD digest notification
+MD_DIGEST_LIMIT = 50
+
+def get_alert_thresholds():
+	"""Utilization thresholds (%) from site config `po_limit_alert_thresholds`, ascending"""
+	thresholds = frappe.conf.get("po_limit_alert_thresholds") or DEFAULT_ALERT_THRESHOLDS
+	return sorted({cint(t) for t in thresholds if cint(t) > 0})
+
+def send_limit_alerts():
+	"""
+	Notify buyers (and MDs) who crossed a monthly utilization threshold.
+	Runs hourly. Each (user, company, threshold) is notified at most once per month.
+	"""
+	thresholds = get_alert_thresholds()
+	if not thresholds:
+		return
+
+	period = get_first_day(today())
+	crossed = get_users_above_threshold(period, thresholds[0])
+	if not crossed:
+		return
+
+	already_sent = get_sent_alerts(period)
+
+	new_alerts = []
+	for row in crossed:
+		reached = [t for t in thresholds if row.utilization >= t]
+		pending = [t for t in reached if (row.user, row.company, t) not in already_sent]
+		if not pending:
+			continue
+
+		# Only notify the highest threshold reached, but record the lower ones as sent
+		row.threshold = reached[-1]
+		row.pending = pending
+		new_alerts.append(row)
+
+	if not new_alerts:
+		return
+
+	record_sent_alerts(period, new_alerts)
+	notify_users(new_alerts)
+	notify_managing_directors(new_alerts)
+
+def get_users_above_threshold(period, min_threshold):
+	"""All active limits whose spend this period is at or above `min_threshold` % of the monthly limit"""
+	rows = frappe.db.sql("""
+		SELECT l.user, l.company, l.per_month_limit, s.amount
+		FROM `tabUser PO Limit` l
+		INNER JOIN `tabPO Monthly Spend` s
+			ON s.user = l.user AND s.company = l.company AND s.month = %(period)s
+		WHERE l.status = 'Active'
+		AND l.per_month_limit > 0
+		AND s.amount >= l.per_month_limit * %(ratio)s
+	""", {"period": period, "ratio": flt(min_threshold) / 100}, as_dict=1)
+
+	for row in rows:
+		row.utilization = flt(row.amount) / flt(row.per_month_limit) * 100
+
+	return rows
+
+def get_sent_alerts(period):
+	"""Set of (user, company, threshold) already alerted for `period`"""
+	return {
+		(a.user, a.company, a.threshold)
+		for a in frappe.get_all("PO Limit Alert",
+			filters={"period": period},
+			fields=["user", "company", "threshold"]
+		)
+	}
+
+def record_sent_alerts(period, alerts):
+	"""Insert PO Limit Alert rows for every newly reached threshold in one statement"""
+	timestamp = now()
+	values = [
+		(frappe.generate_hash(length=10), timestamp, timestamp, "Administrator", "Administrator",
+			row.user, row.company, period, threshold, flt(row.utilization, 2))
+		for row in alerts
+		for threshold in row.pending
+	]
+
+	frappe.db.bulk_insert("PO Limit Alert",
+		fields=["name", "creation", "modified", "owner", "modified_by",
+			"user", "company", "period", "threshold", "utilization"],
+		values=values,
+		ignore_duplicates=True
+	)
+
+def notify_users(alerts):
+	"""Send one notification batch per (company, threshold) group"""
+	groups = {}
+	for row in alerts:
+		groups.setdefault((row.company, row.threshold), []).append(row.user)
+
+	for (company, threshold), users in groups.items():
+		enqueue_create_notification(users, {
+			"type": "Alert",
+			"document_type": "Company",
+			"document_name": company,
+			"subject": _("You have used over {0}% of your monthly PO limit for {1}").format(threshold, company),
+			"email_content": _("Your submitted Purchase Orders this month have reached {0}% of your Per Month Limit for {1}. "
+				"Request a limit increase if you expect to exceed it.").format(threshold, company)
+		})
+
+def notify_managing_directors(alerts):
+	"""Send MDs a single digest of everyone who crossed a threshold in this run"""
+	managing_directors = frappe.get_all("Has Role",
+		filters={"role": "Managing Director", "parenttype": "User"},
+		pluck="parent",
+		distinct=True
+	)
+	if not managing_directors:
+		return
+
+	alerts = sorted(alerts, key=lambda row: row.utilization, reverse=True)
+	lines = [
+		"{0} ({1}): {2}%".format(row.user, row.company, flt(row.utilization, 1))
+		for row in alerts[:MD_DIGEST_LIMIT]
+	]
+	if len(alerts) > MD_DIGEST_LIMIT:
+		lines.append(_("...and {0} more").format(len(alerts) - MD_DIGEST_LIMIT))
+
+	enqueue_create_notification(managing_directors, {
+		"type": "Alert",
+		"document_type": "User PO Limit",
+		"subject": _("{0} user(s) are nearing their monthly PO limits").format(len(alerts)),
+		"email_content": "<br>".join(lines)
+	})
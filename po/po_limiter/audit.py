@@ -0,0 +1,151 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+import csv
+import gzip
+import os
+
+import frappe
+from frappe.utils import add_months, cint, flt, get_first_day, now_datetime, today
+
+# Values a freshly provisioned User PO Limit starts with
+DEFAULT_LIMIT_VALUES = {"status": "Revoked", "per_po_limit": 0, "per_month_limit": 0,
+	"per_quarter_limit": 0, "per_year_limit": 0}
+
+# Limit fields whose changes are audited as old_<field> / new_<field>
+LIMIT_FIELDS = ["per_po_limit", "per_month_limit", "per_quarter_limit", "per_year_limit"]
+
+ARCHIVE_FIELDS = [
+	"name", "user", "company", "user_po_limit", "source", "changed_by", "changed_on", "period",
+	"old_status", "new_status", "old_per_po_limit", "new_per_po_limit",
+	"old_per_month_limit", "new_per_month_limit", "old_per_quarter_limit", "new_per_quarter_limit",
+	"old_per_year_limit", "new_per_year_limit"
+]
+
+def log_limit_change(user, company, old, new, source, user_po_limit=None):
+	"""
+	Append a PO Limit Audit Log entry for a limit change.
+	Nothing is written when status and limits are unchanged.
+
+	Args:
+		user: User the limit belongs to
+		company: Company the limit applies to
+		old: dict of previous values (None for a new limit)
+		new: dict of new values; missing keys keep their old value
+		source: Dashboard, Approval, Import, Manual or System
+		user_po_limit: Name of the User PO Limit record
+	"""
+	old, new = get_old_and_new_values(old, new)
+
+	if old == new:
+		return
+
+	changed_on = now_datetime()
+	entry = {
+		"doctype": "PO Limit Audit Log",
+		"user": user,
+		"company": company,
+		"user_po_limit": user_po_limit,
+		"source": source,
+		"changed_by": frappe.session.user,
+		"changed_on": changed_on,
+		"period": changed_on.strftime("%Y-%m")
+	}
+	for field in old:
+		entry["old_" + field] = old[field]
+		entry["new_" + field] = new[field]
+
+	frappe.get_doc(entry).insert(ignore_permissions=True)
+
+def get_old_and_new_values(old, new):
+	"""
+	Audited status and limit values before and after a change.
+	Missing old values count as a fresh limit, missing new values as unchanged.
+	"""
+	old = frappe._dict(DEFAULT_LIMIT_VALUES, **(old or {}))
+	new = frappe._dict(new or {})
+
+	old_values = {"status": old.status}
+	new_values = {"status": new.get("status") or old.status}
+	for field in LIMIT_FIELDS:
+		old_values[field] = flt(old.get(field))
+		new_values[field] = flt(new.get(field, old.get(field)))
+
+	return old_values, new_values
+
+def bulk_log_limit_changes(changes, source):
+	"""
+	Append PO Limit Audit Log entries for many limit changes in one statement.
+
+	Args:
+		changes: list of dicts with user, company, user_po_limit, old and new (as for log_limit_change)
+		source: Dashboard, Approval, Import, Manual or System
+	"""
+	changed_on = now_datetime()
+	period = changed_on.strftime("%Y-%m")
+	actor = frappe.session.user
+
+	fields = ["status"] + LIMIT_FIELDS
+
+	values = []
+	for change in changes:
+		old, new = get_old_and_new_values(change["old"], change["new"])
+		values.append((
+			frappe.generate_hash(length=10), changed_on, changed_on, actor, actor,
+			change["user"], change["company"], change.get("user_po_limit"), source, actor, changed_on, period
+		) + tuple(old[f] for f in fields) + tuple(new[f] for f in fields))
+
+	if not values:
+		return
+
+	frappe.db.bulk_insert("PO Limit Audit Log",
+		fields=["name", "creation", "modified", "owner", "modified_by",
+			"user", "company", "user_po_limit", "source", "changed_by", "changed_on", "period"]
+			+ ["old_" + f for f in fields] + ["new_" + f for f in fields],
+		values=values
+	)
+
+def archive_audit_log():
+	"""
+	Move audit entries older than the retention window into one gzipped CSV per period.
+	Runs monthly. Disabled unless `po_limit_audit_retention_months` is set in site config.
+	Archives are written to private/files/po_limit_audit_archive/<period>.csv.gz
+	"""
+	retention_months = cint(frappe.conf.get("po_limit_audit_retention_months"))
+	if retention_months <= 0:
+		return
+
+	cutoff = get_first_day(add_months(today(), -retention_months)).strftime("%Y-%m")
+
+	periods = frappe.db.sql("""
+		SELECT DISTINCT period
+		FROM `tabPO Limit Audit Log`
+		WHERE period < %s
+		ORDER BY period
+	""", (cutoff,), pluck=True)
+
+	if not periods:
+		return
+
+	archive_dir = frappe.get_site_path("private", "files", "po_limit_audit_archive")
+	os.makedirs(archive_dir, exist_ok=True)
+
+	for period in periods:
+		rows = frappe.db.sql("""
+			SELECT {fields}
+			FROM `tabPO Limit Audit Log`
+			WHERE period = %s
+			ORDER BY changed_on
+		""".format(fields=", ".join(f"`{f}`" for f in ARCHIVE_FIELDS)), (period,))
+
+		# Append so that a re-run for the same period never loses earlier rows
+		path = os.path.join(archive_dir, f"{period}.csv.gz")
+		write_header = not os.path.exists(path)
+		with gzip.open(path, "at", newline="") as f:
+			writer = csv.writer(f)
+			if write_header:
+				writer.writerow(ARCHIVE_FIELDS)
+			writer.writerows(rows)
+
+		frappe.db.delete("PO Limit Audit Log", {"period": period})
+		frappe.db.commit()
@@ -0,0 +1,176 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+"""
+Batch auto-approval of PO Limit Increase Requests.
+
+Enabled PO Limit Auto Approval Rules are compiled once per run into lists of predicates.
+Every pending request is then evaluated in memory against the current limits and roles,
+which are loaded for all requesting users in one query each. Approved limits are written
+with one joined multi-row update, and the requests are marked Approved in one update per rule.
+"""
+
+import frappe
+from frappe.utils import flt, now
+
+from po.po_limiter.audit import bulk_log_limit_changes
+from po.po_limiter.limit_snapshot import clear_limit_snapshot
+
+def process_pending_requests():
+	"""Approve every pending request that matches an enabled rule. Runs hourly."""
+	rules = compile_rules()
+	if not rules:
+		return
+
+	requests = frappe.get_all("PO Limit Increase Request",
+		filters={"status": "Pending Approval", "docstatus": 1},
+		fields=["name", "user", "company", "requested_per_po_limit", "requested_per_month_limit"]
+	)
+	if not requests:
+		return
+
+	users = list({r.user for r in requests})
+	limits = get_limits(users)
+	roles = get_roles(users)
+
+	pending_count = {}
+	for request in requests:
+		key = (request.user, request.company)
+		pending_count[key] = pending_count.get(key, 0) + 1
+
+	approved = []
+	for request in requests:
+		key = (request.user, request.company)
+		current = limits.get(key)
+		# Revoked or missing limits, and competing requests, always need an MD decision
+		if not current or current.status != "Active" or pending_count[key] > 1:
+			continue
+
+		for rule_name, checks in rules:
+			if all(check(request, current, roles.get(request.user, set())) for check in checks):
+				approved.append((request, rule_name, current))
+				break
+
+	if approved:
+		apply_approvals(approved)
+
+def compile_rules():
+	"""Load enabled rules, highest priority first, as (rule name, [predicate, ...])"""
+	rules = frappe.get_all("PO Limit Auto Approval Rule",
+		filters={"enabled": 1},
+		fields=["name", "company", "role", "max_increase_percent", "max_per_po_limit", "max_per_month_limit"],
+		order_by="priority desc, name asc"
+	)
+	return [(rule.name, compile_rule(rule)) for rule in rules]
+
+def compile_rule(rule):
+	"""Turn one rule into predicates of (request, current limit, user roles)"""
+	checks = []
+
+	if rule.company:
+		checks.append(lambda request, current, roles, company=rule.company: request.company == company)
+
+	if rule.role:
+		checks.append(lambda request, current, roles, role=rule.role: role in roles)
+
+	if flt(rule.max_increase_percent):
+		checks.append(lambda request, current, roles, pct=flt(rule.max_increase_percent):
+			within_increase(current.per_po_limit, request.requested_per_po_limit, pct)
+			and within_increase(current.per_month_limit, request.requested_per_month_limit, pct))
+
+	# A limit without an absolute cap or a percentage may not be raised at all
+	for field, cap in (("per_po_limit", rule.max_per_po_limit), ("per_month_limit", rule.max_per_month_limit)):
+		if flt(cap):
+			checks.append(lambda request, current, roles, field=field, cap=flt(cap):
+				flt(request.get("requested_" + field)) <= cap)
+		elif not flt(rule.max_increase_percent):
+			checks.append(lambda request, current, roles, field=field:
+				flt(request.get("requested_" + field)) <= flt(current.get(field)))
+
+	return checks
+
+def within_increase(current, requested, max_percent):
+	"""True if `requested` is at most `max_percent` above `current`"""
+	current, requested = flt(current), flt(requested)
+	if requested <= current:
+		return True
+	if current <= 0:
+		return False
+	return (requested - current) / current * 100 <= max_percent
+
+def get_limits(users):
+	"""Current User PO Limits of the users as {(user, company): limit}"""
+	rows = frappe.get_all("User PO Limit",
+		filters={"user": ["in", users]},
+		fields=["name", "user", "company", "status", "per_po_limit", "per_month_limit",
+			"per_quarter_limit", "per_year_limit"]
+	)
+	return {(row.user, row.company): row for row in rows}
+
+def get_roles(users):
+	"""Roles of the users as {user: set(roles)}"""
+	roles = {}
+	for row in frappe.get_all("Has Role",
+		filters={"parent": ["in", users], "parenttype": "User"},
+		fields=["parent", "role"]
+	):
+		roles.setdefault(row.parent, set()).add(row.role)
+	return roles
+
+def apply_approvals(approved):
+	"""Write approved limits and mark the requests approved, set-based"""
+	timestamp = now()
+	actor = frappe.session.user
+
+	# Auto-approval only touches existing Active limits, so the upsert is a single
+	# UPDATE joined against the approved values.
+	selects = []
+	values = {"timestamp": timestamp, "actor": actor}
+	for i, (request, rule_name, current) in enumerate(approved):
+		selects.append(f"SELECT %(name_{i})s AS name, %(per_po_{i})s AS per_po_limit, %(per_month_{i})s AS per_month_limit")
+		values[f"name_{i}"] = current.name
+		values[f"per_po_{i}"] = flt(request.requested_per_po_limit)
+		values[f"per_month_{i}"] = flt(request.requested_per_month_limit)
+
+	frappe.db.sql("""
+		UPDATE `tabUser PO Limit` l
+		INNER JOIN ({approved}) a ON a.name = l.name
+		SET l.per_po_limit = a.per_po_limit,
+			l.per_month_limit = a.per_month_limit,
+			l.last_updated_by = %(actor)s,
+			l.last_updated_date = %(timestamp)s,
+			l.modified = %(timestamp)s,
+			l.modified_by = %(actor)s
+	""".format(approved=" UNION ALL ".join(selects)), values)
+
+	clear_limit_snapshot([request.user for request, rule_name, current in approved])
+
+	by_rule = {}
+	for request, rule_name, current in approved:
+		by_rule.setdefault(rule_name, []).append(request.name)
+
+	for rule_name, request_names in by_rule.items():
+		frappe.db.sql("""
+			UPDATE `tabPO Limit Increase Request`
+			SET status = 'Approved',
+				approved_by = %(actor)s,
+				approval_date = %(timestamp)s,
+				auto_approval_rule = %(rule)s,
+				modified = %(timestamp)s,
+				modified_by = %(actor)s
+			WHERE name IN %(requests)s
+		""", {"actor": actor, "timestamp": timestamp, "rule": rule_name, "requests": tuple(request_names)})
+
+	bulk_log_limit_changes([
+		{
+			"user": request.user,
+			"company": request.company,
+			"user_po_limit": current.name,
+			"old": current,
+			"new": {
+				"per_po_limit": request.requested_per_po_limit,
+				"per_month_limit": request.requested_per_month_limit
+			}
+		}
+		for request, rule_name, current in approved
+	], "Approval")
@@ -0,0 +1,8 @@
+// Copyright (c) 2026, Lassod
+// License: MIT
+
+frappe.ui.form.on('PO Limit Alert', {
+	// refresh: function(frm) {
+
+	// }
+});
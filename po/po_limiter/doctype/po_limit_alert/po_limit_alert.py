@@ -0,0 +1,15 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+import frappe
+from frappe.model.document import Document
+
+class POLimitAlert(Document):
+	pass
+
+
+def on_doctype_update():
+	"""One alert per user, company, period and threshold"""
+	frappe.db.add_unique("PO Limit Alert", ["user", "company", "period", "threshold"],
+		constraint_name="unique_user_company_period_threshold")
+	frappe.db.add_index("PO Limit Alert", ["period"])
@@ -0,0 +1,3 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
@@ -0,0 +1,22 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+
+class POLimitAuditLog(Document):
+	def validate(self):
+		"""Audit entries are append-only"""
+		if not self.is_new():
+			frappe.throw(_("PO Limit Audit Log entries cannot be modified"))
+
+	def on_trash(self):
+		"""Audit entries are append-only"""
+		frappe.throw(_("PO Limit Audit Log entries cannot be deleted"))
+
+
+def on_doctype_update():
+	"""Index history lookups by user, company and time, and archiving by period"""
+	frappe.db.add_index("PO Limit Audit Log", ["user", "company", "changed_on"])
+	frappe.db.add_index("PO Limit Audit Log", ["period"])
@@ -0,0 +1,16 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import flt
+
+class POLimitAutoApprovalRule(Document):
+	def validate(self):
+		"""A rule must bound both limits, or it would approve any value of the unbounded one"""
+		if flt(self.max_increase_percent):
+			return
+
+		if not (flt(self.max_per_po_limit) and flt(self.max_per_month_limit)):
+			frappe.throw(_("Set Max Increase %, or both Max Per PO Limit and Max Per Month Limit"))
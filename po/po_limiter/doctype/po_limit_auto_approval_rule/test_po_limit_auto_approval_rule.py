@@ -0,0 +1,97 @@
+# Copyright (c) 2026, Ejiroghene Dominic and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import today
+
+from po.po_limiter.auto_approval import compile_rule, process_pending_requests, within_increase
+from po.po_limiter.testing import insert_rows
+
+TEST_USER = "_test_auto_approval@example.com"
+
+
+class TestPOLimitAutoApprovalRule(FrappeTestCase):
+	def setUp(self):
+		self.company = frappe.db.get_value("Company", {}, "name")
+		frappe.db.savepoint("po_auto_approval")
+		frappe.db.set_value("PO Limit Auto Approval Rule", {"enabled": 1}, "enabled", 0)
+
+	def tearDown(self):
+		frappe.db.rollback(save_point="po_auto_approval")
+
+	def test_within_increase(self):
+		self.assertTrue(within_increase(1000, 1100, 10))
+		self.assertFalse(within_increase(1000, 1101, 10))
+		self.assertTrue(within_increase(1000, 500, 10))
+		self.assertTrue(within_increase(0, 0, 10))
+		self.assertFalse(within_increase(0, 1, 10))
+
+	def test_rule_must_bound_both_limits(self):
+		rule = frappe.get_doc({"doctype": "PO Limit Auto Approval Rule", "max_per_po_limit": 5000})
+		self.assertRaises(frappe.ValidationError, rule.validate)
+
+		rule.max_per_month_limit = 50000
+		rule.validate()
+
+		frappe.get_doc({"doctype": "PO Limit Auto Approval Rule", "max_increase_percent": 10}).validate()
+
+	def test_unbounded_limit_is_not_raised(self):
+		checks = compile_rule(frappe._dict({"max_per_po_limit": 5000}))
+		current = frappe._dict({"per_po_limit": 1000, "per_month_limit": 10000})
+
+		request = frappe._dict({"requested_per_po_limit": 5000, "requested_per_month_limit": 10 ** 9})
+		self.assertFalse(all(check(request, current, set()) for check in checks))
+
+		request.requested_per_month_limit = 10000
+		self.assertTrue(all(check(request, current, set()) for check in checks))
+
+	def test_highest_priority_rule_wins(self):
+		self.make_limit_and_requests(1)
+		self.make_rule("_Test Low Priority", 1)
+		self.make_rule("_Test High Priority", 10)
+
+		process_pending_requests()
+
+		self.assertEqual(self.get_requests(), [("Approved", "_Test High Priority")])
+		self.assertEqual(frappe.db.get_value("User PO Limit", {"user": TEST_USER}, "per_po_limit"), 1100)
+
+	def test_competing_requests_are_skipped(self):
+		self.make_limit_and_requests(2)
+		self.make_rule("_Test High Priority", 10)
+
+		process_pending_requests()
+
+		self.assertEqual(self.get_requests(), [("Pending Approval", None), ("Pending Approval", None)])
+		self.assertEqual(frappe.db.get_value("User PO Limit", {"user": TEST_USER}, "per_po_limit"), 1000)
+
+	def make_rule(self, rule_name, priority):
+		frappe.get_doc({
+			"doctype": "PO Limit Auto Approval Rule",
+			"rule_name": rule_name,
+			"enabled": 1,
+			"priority": priority,
+			"max_increase_percent": 20
+		}).insert(ignore_permissions=True)
+
+	def make_limit_and_requests(self, request_count):
+		if not self.company:
+			self.skipTest("No Company available")
+
+		if not frappe.db.exists("User", TEST_USER):
+			insert_rows("User", ["email", "first_name", "enabled", "user_type"],
+				[(TEST_USER, TEST_USER, TEST_USER, 1, "System User")])
+		frappe.db.delete("User PO Limit", {"user": TEST_USER})
+		frappe.db.delete("PO Limit Increase Request", {"user": TEST_USER})
+
+		insert_rows("User PO Limit", ["user", "company", "status", "per_po_limit", "per_month_limit",
+				"monthly_usage", "last_reset_date"],
+			[(None, TEST_USER, self.company, "Active", 1000, 10000, 0, today())])
+		insert_rows("PO Limit Increase Request", ["naming_series", "user", "company", "requested_per_po_limit",
+				"requested_per_month_limit", "reason", "status", "docstatus"],
+			[(None, "PO-LIR-.YYYY.-", TEST_USER, self.company, 1100, 11000, "Auto approval test", "Pending Approval", 1)
+				for _ in range(request_count)])
+
+	def get_requests(self):
+		return [tuple(r) for r in frappe.get_all("PO Limit Increase Request",
+			filters={"user": TEST_USER}, fields=["status", "auto_approval_rule"], as_list=1)]
@@ -6,6 +6,10 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import now, nowdate
 
+from po.po_limiter.audit import log_limit_change
+from po.po_limiter.limit_snapshot import clear_limit_snapshot
+from po.po_limiter.permissions import has_md_access
+
 class POLimitIncreaseRequest(Document):
 	def validate(self):
 		"""Validate the request before saving"""
@@ -91,20 +95,25 @@ class POLimitIncreaseRequest(Document):
 	def update_user_po_limit(self):
 		"""Update or create User PO Limit record"""
 		# Check if limit record exists
-		exists = frappe.db.exists("User PO Limit", {
+		existing = frappe.db.get_value("User PO Limit", {
 			"user": self.user,
 			"company": self.company
-		})
+		}, ["name", "status", "per_po_limit", "per_month_limit", "per_quarter_limit", "per_year_limit"], as_dict=1)
 
-		if exists:
+		if existing:
 			# Update existing record
-			frappe.db.set_value("User PO Limit", exists, {
+			frappe.db.set_value("User PO Limit", existing.name, {
 				"per_po_limit": self.requested_per_po_limit,
 				"per_month_limit": self.requested_per_month_limit
 			})
+			log_limit_change(self.user, self.company, existing, {
+				"per_po_limit": self.requested_per_po_limit,
+				"per_month_limit": self.requested_per_month_limit
+			}, "Approval", user_po_limit=existing.name)
+			clear_limit_snapshot(self.user)
 		else:
 			# Create new record
-			frappe.get_doc({
+			limit = frappe.get_doc({
 				"doctype": "User PO Limit",
 				"user": self.user,
 				"company": self.company,
@@ -112,13 +121,18 @@ class POLimitIncreaseRequest(Document):
 				"per_month_limit": self.requested_per_month_limit,
 				"monthly_usage": 0,
 				"last_reset_date": frappe.utils.today()
-			}).insert()
+			})
+			limit.flags.audit_source = "Approval"
+			limit.insert()
 
 
 # Whitelist methods for use from client
 @frappe.whitelist()
 def approve_request(request_name):
 	"""Approve a PO Limit Increase Request"""
+	if not has_md_access():
+		frappe.throw(_("You don't have permission to perform this action."), frappe.PermissionError)
+
 	doc = frappe.get_doc("PO Limit Increase Request", request_name)
 	doc.approve_request()
 
@@ -126,5 +140,8 @@ def approve_request(request_name):
 @frappe.whitelist()
 def reject_request(request_name, rejection_reason=""):
 	"""Reject a PO Limit Increase Request"""
+	if not has_md_access():
+		frappe.throw(_("You don't have permission to perform this action."), frappe.PermissionError)
+
 	doc = frappe.get_doc("PO Limit Increase Request", request_name)
 	doc.reject_request(rejection_reason)
@@ -0,0 +1,15 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+import frappe
+from frappe.model.document import Document
+
+class POMonthlySpend(Document):
+	pass
+
+
+def on_doctype_update():
+	"""One rollup row per user, company and month"""
+	frappe.db.add_unique("PO Monthly Spend", ["user", "company", "month"],
+		constraint_name="unique_user_company_month")
+	frappe.db.add_index("PO Monthly Spend", ["month"])
@@ -0,0 +1,16 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+import frappe
+from frappe.model.document import Document
+
+class POUsageLedgerEntry(Document):
+	pass
+
+
+def on_doctype_update():
+	"""One entry per Purchase Order and transition; totals are summed per user, company and month"""
+	frappe.db.add_unique("PO Usage Ledger Entry", ["purchase_order", "transition"],
+		constraint_name="unique_purchase_order_transition")
+	frappe.db.add_index("PO Usage Ledger Entry", ["user", "company", "month"])
+	frappe.db.add_index("PO Usage Ledger Entry", ["pending_rollup"])
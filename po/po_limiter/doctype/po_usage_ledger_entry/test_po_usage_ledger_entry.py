@@ -0,0 +1,42 @@
+# Copyright (c) 2026, Ejiroghene Dominic and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import get_first_day, today
+
+from po.po_limiter.spend import defer_spend, get_month_spend
+from po.po_limiter.usage_ledger import record_usage
+
+
+class TestPOUsageLedgerEntry(FrappeTestCase):
+	def make_purchase_order(self, name):
+		company = frappe.db.get_value("Company", {}, "name")
+		if not company:
+			self.skipTest("No Company available")
+
+		return frappe._dict({
+			"name": name,
+			"owner": "Administrator",
+			"company": company,
+			"transaction_date": today(),
+			"base_grand_total": 100
+		})
+
+	def test_replayed_transition_is_not_recorded_twice(self):
+		doc = self.make_purchase_order("_Test PO Ledger Replay")
+
+		self.assertTrue(record_usage(doc, "Submit", 100))
+		self.assertFalse(record_usage(doc, "Submit", 100))
+		self.assertTrue(record_usage(doc, "Cancel", -100))
+		self.assertEqual(frappe.db.count("PO Usage Ledger Entry", {"purchase_order": doc.name}), 2)
+
+	def test_deferred_spend_counts_before_it_is_folded(self):
+		doc = self.make_purchase_order("_Test PO Ledger Deferred")
+		month = get_first_day(today())
+		spend = get_month_spend(doc.owner, doc.company, month)
+
+		record_usage(doc, "Submit", 100)
+		defer_spend(doc, "Submit")
+
+		self.assertEqual(get_month_spend(doc.owner, doc.company, month), spend + 100)
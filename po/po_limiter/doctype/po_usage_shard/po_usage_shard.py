@@ -0,0 +1,14 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+import frappe
+from frappe.model.document import Document
+
+class POUsageShard(Document):
+	pass
+
+
+def on_doctype_update():
+	"""One counter per limit, period and shard number"""
+	frappe.db.add_unique("PO Usage Shard", ["user_po_limit", "period", "shard"],
+		constraint_name="unique_limit_period_shard")
@@ -0,0 +1,93 @@
+# Copyright (c) 2026, Ejiroghene Dominic and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import get_first_day, today
+
+from po.po_limiter.spend import add_spend
+from po.po_limiter.usage_shards import get_active_shard_names, get_shards, release_usage, reserve_usage
+
+LIMIT_NAME = "_Test Sharded Limit"
+TEST_USER = "_test_sharded@example.com"
+TEST_COMPANY = "_Test Sharded Company"
+
+
+class TestPOUsageShard(FrappeTestCase):
+	def setUp(self):
+		frappe.db.savepoint("po_usage_shard")
+		self.period = get_first_day(today())
+		self.limit = {"name": LIMIT_NAME, "user": TEST_USER, "company": TEST_COMPANY,
+			"per_month_limit": 1000, "usage_shards": 4}
+
+	def tearDown(self):
+		frappe.db.rollback(save_point="po_usage_shard")
+
+	def get_amounts(self):
+		return get_shards(LIMIT_NAME, self.period)
+
+	def test_fast_path_adds_to_one_shard(self):
+		self.assertEqual(reserve_usage(self.limit, self.period, 100), (True, 0))
+
+		amounts = sorted(self.get_amounts().values())
+		self.assertEqual(amounts, [0, 0, 0, 100])
+
+	def test_slow_path_rebalances_within_allocations(self):
+		for _ in range(4):
+			reserve_usage(self.limit, self.period, 200)
+
+		# No single shard has 150 left, but the total does
+		self.assertEqual(reserve_usage(self.limit, self.period, 150), (True, 800))
+
+		amounts = self.get_amounts().values()
+		self.assertEqual(sum(amounts), 950)
+		self.assertTrue(all(amount <= 250 for amount in amounts))
+
+	def test_reserve_over_limit_is_refused(self):
+		for _ in range(4):
+			reserve_usage(self.limit, self.period, 250)
+
+		self.assertEqual(reserve_usage(self.limit, self.period, 1), (False, 1000))
+		self.assertEqual(sum(self.get_amounts().values()), 1000)
+
+	def test_lowered_shard_count_folds_extra_shards(self):
+		self.limit["usage_shards"] = 8
+		for _ in range(8):
+			reserve_usage(self.limit, self.period, 100)
+
+		self.limit["usage_shards"] = 4
+		self.assertEqual(reserve_usage(self.limit, self.period, 100), (True, 800))
+
+		active = get_active_shard_names(LIMIT_NAME, self.period, 4)
+		amounts = self.get_amounts()
+		self.assertEqual(sum(amounts.values()), 900)
+		self.assertTrue(all(amount <= 250 for name, amount in amounts.items() if name in active))
+		self.assertTrue(all(amount == 0 for name, amount in amounts.items() if name not in active))
+
+	def test_release_usage(self):
+		for _ in range(4):
+			reserve_usage(self.limit, self.period, 200)
+
+		release_usage(self.limit, self.period, 300)
+
+		amounts = self.get_amounts().values()
+		self.assertEqual(sum(amounts), 500)
+		self.assertTrue(all(amount >= 0 for amount in amounts))
+
+	def test_enable_sharding_with_existing_spend(self):
+		# Submitted before Usage Shards was turned on, so only in the rollup
+		add_spend(TEST_USER, TEST_COMPANY, self.period, 900, 3)
+
+		self.assertEqual(reserve_usage(self.limit, self.period, 100), (True, 900))
+		self.assertEqual(reserve_usage(self.limit, self.period, 1), (False, 1000))
+
+		amounts = self.get_amounts().values()
+		self.assertEqual(sum(amounts), 1000)
+		self.assertTrue(all(amount <= 250 for amount in amounts))
+
+	def test_release_usage_submitted_before_sharding(self):
+		add_spend(TEST_USER, TEST_COMPANY, self.period, 600, 2)
+
+		release_usage(self.limit, self.period, 200)
+
+		self.assertEqual(sum(self.get_amounts().values()), 400)
@@ -41,11 +41,34 @@ class UserPOLimit(Document):
 		if self.status == "Revoked":
 			self.per_po_limit = 0
 			self.per_month_limit = 0
+			self.per_quarter_limit = 0
+			self.per_year_limit = 0
 
 	def on_update(self):
 		"""After updating the document"""
 		# Reset monthly usage if needed
 		self.reset_monthly_usage_if_needed()
+		self.log_limit_change()
+
+	def log_limit_change(self):
+		"""Record status and limit changes in the PO Limit Audit Log"""
+		from po.po_limiter.audit import log_limit_change
+
+		before = self.get_doc_before_save()
+		source = "Import" if frappe.flags.in_import else (self.flags.audit_source or "Manual")
+
+		log_limit_change(self.user, self.company,
+			before.as_dict() if before else None,
+			{
+				"status": self.status,
+				"per_po_limit": self.per_po_limit,
+				"per_month_limit": self.per_month_limit,
+				"per_quarter_limit": self.per_quarter_limit,
+				"per_year_limit": self.per_year_limit
+			},
+			source,
+			user_po_limit=self.name
+		)
 
 	def reset_monthly_usage_if_needed(self):
 		"""Reset monthly usage if we're in a new month"""
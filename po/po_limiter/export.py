@@ -0,0 +1,225 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+"""
+Streaming export of limits, usage and increase-request history for BI.
+
+Each dataset is read in keyset-paginated chunks ordered by (modified, name) and written
+straight to a compressed file, so memory use stays flat however large the tables are.
+Snapshots are written to private/files/po_exports/<snapshot>/ with a manifest.json.
+Pass `since` (a datetime, or "last" for the previous snapshot) for an incremental
+snapshot of rows changed since then. `modified` is set by the app before commit, so a row can
+commit after a snapshot with an older `modified`. "last" therefore re-reads SINCE_OVERLAP_MINUTES before
+the previous snapshot time; consumers dedupe on (name, modified).
+"""
+
+import csv
+import gzip
+import json
+import os
+
+import frappe
+from frappe import _
+from frappe.utils import add_to_date, cint, cstr, flt, get_datetime, now_datetime
+
+from po.po_limiter.permissions import has_md_access
+
+CHUNK_SIZE = 5000
+
+EXPORT_DIR = ("private", "files", "po_exports")
+
+LAST_SNAPSHOT_FILE = "last_snapshot.json"
+
+# How far before the previous snapshot time a "last" export starts; must exceed the longest
+# transaction that writes limiter rows
+SINCE_OVERLAP_MINUTES = 15
+
+DATASETS = {
+	"user_po_limit": {
+		"doctype": "User PO Limit",
+		"fields": ["name", "user", "company", "status", "per_po_limit", "per_month_limit",
+			"per_quarter_limit", "per_year_limit", "monthly_usage", "usage_shards", "last_reset_date", "last_updated_by", "last_updated_date", "modified"]
+	},
+	"po_monthly_spend": {
+		"doctype": "PO Monthly Spend",
+		"fields": ["name", "user", "company", "month", "amount", "po_count", "modified"]
+	},
+	"po_usage_shard": {
+		"doctype": "PO Usage Shard",
+		"fields": ["name", "user_po_limit", "period", "shard", "amount", "modified"]
+	},
+	"po_usage_ledger_entry": {
+		"doctype": "PO Usage Ledger Entry",
+		"fields": ["name", "purchase_order", "transition", "user", "company", "month", "amount", "modified"]
+	},
+	"po_limit_increase_request": {
+		"doctype": "PO Limit Increase Request",
+		"fields": ["name", "user", "company", "status", "current_per_po_limit", "current_per_month_limit",
+			"requested_per_po_limit", "requested_per_month_limit", "approved_by", "approval_date",
+			"docstatus", "creation", "modified"]
+	}
+}
+
+FILE_FORMATS = ("csv", "parquet")
+
+@frappe.whitelist()
+def enqueue_export(since=None, file_format="csv"):
+	"""Start a snapshot export as a background job"""
+	if not has_md_access():
+		frappe.throw(_("You don't have permission to perform this action."), frappe.PermissionError)
+
+	if file_format not in FILE_FORMATS:
+		frappe.throw(_("Export format must be one of {0}").format(", ".join(FILE_FORMATS)))
+
+	frappe.enqueue("po.po_limiter.export.export_snapshot",
+		queue="long",
+		timeout=3600,
+		since=since,
+		file_format=file_format
+	)
+	frappe.msgprint(_("PO limit export queued"))
+
+def export_snapshot(since=None, file_format="csv"):
+	"""
+	Write every dataset to compressed files and return the manifest.
+	Runs on the primary. A lagging replica could miss rows that are older than the snapshot
+	time, and the next incremental export would then skip them for good.
+
+	Args:
+		since: Only export rows modified after this datetime; "last" uses the previous snapshot
+			time less SINCE_OVERLAP_MINUTES, so rows repeat across snapshots and are deduped on (name, modified)
+		file_format: "csv" (gzipped) or "parquet"
+	"""
+	export_root = frappe.get_site_path(*EXPORT_DIR)
+	if since == "last":
+		since = get_last_snapshot_time(export_root)
+		if since:
+			since = add_to_date(since, minutes=-SINCE_OVERLAP_MINUTES)
+
+	snapshot_time = now_datetime()
+	snapshot_dir = os.path.join(export_root, snapshot_time.strftime("%Y%m%d%H%M%S"))
+	os.makedirs(snapshot_dir, exist_ok=True)
+
+	write = write_parquet if file_format == "parquet" else write_csv
+	extension = "parquet" if file_format == "parquet" else "csv.gz"
+
+	manifest = {
+		"snapshot_time": str(snapshot_time),
+		"since": cstr(since) or None,
+		"format": file_format,
+		"dedupe_key": ["name", "modified"],
+		"files": {}
+	}
+
+	for key, dataset in DATASETS.items():
+		path = os.path.join(snapshot_dir, f"{key}.{extension}")
+		rows = write(path, dataset["doctype"], dataset["fields"], iter_chunks(dataset["doctype"], dataset["fields"], since))
+		manifest["files"][key] = {"path": os.path.relpath(path, export_root), "rows": rows}
+
+	with open(os.path.join(snapshot_dir, "manifest.json"), "w") as f:
+		json.dump(manifest, f, indent=1)
+
+	with open(os.path.join(export_root, LAST_SNAPSHOT_FILE), "w") as f:
+		json.dump({"snapshot_time": manifest["snapshot_time"], "path": os.path.basename(snapshot_dir)}, f)
+
+	return manifest
+
+def get_last_snapshot_time(export_root):
+	"""Snapshot time of the previous export, or None for a full export"""
+	path = os.path.join(export_root, LAST_SNAPSHOT_FILE)
+	if not os.path.exists(path):
+		return None
+
+	with open(path) as f:
+		return get_datetime(json.load(f)["snapshot_time"])
+
+def iter_chunks(doctype, fields, since=None):
+	"""Yield lists of rows, CHUNK_SIZE at a time, using (modified, name) as the keyset"""
+	columns = ", ".join(f"`{f}`" for f in fields)
+	modified_index = fields.index("modified")
+	name_index = fields.index("name")
+
+	cursor = None
+	while True:
+		conditions = []
+		values = {"limit": CHUNK_SIZE}
+		if since:
+			conditions.append("`modified` >= %(since)s")
+			values["since"] = since
+		if cursor:
+			conditions.append("(`modified` > %(last_modified)s OR (`modified` = %(last_modified)s AND `name` > %(last_name)s))")
+			values["last_modified"], values["last_name"] = cursor
+
+		rows = frappe.db.sql("""
+			SELECT {columns}
+			FROM `tab{doctype}`
+			{where}
+			ORDER BY `modified`, `name`
+			LIMIT %(limit)s
+		""".format(
+			columns=columns,
+			doctype=doctype,
+			where="WHERE " + " AND ".join(conditions) if conditions else ""
+		), values, as_list=1)
+
+		if not rows:
+			return
+
+		yield rows
+
+		if len(rows) < CHUNK_SIZE:
+			return
+
+		cursor = (rows[-1][modified_index], rows[-1][name_index])
+
+def write_csv(path, doctype, fields, chunks):
+	"""Stream chunks to a gzipped CSV file and return the row count"""
+	count = 0
+	with gzip.open(path, "wt", newline="") as f:
+		writer = csv.writer(f)
+		writer.writerow(fields)
+		for rows in chunks:
+			writer.writerows(rows)
+			count += len(rows)
+	return count
+
+def write_parquet(path, doctype, fields, chunks):
+	"""Stream chunks to a Parquet file, one row group per chunk, and return the row count"""
+	try:
+		import pyarrow as pa
+		import pyarrow.parquet as pq
+	except ImportError:
+		frappe.throw(_("Parquet export requires the pyarrow package. Install it in the bench environment or export as CSV."))
+
+	schema = get_parquet_schema(pa, doctype, fields)
+
+	converters = [
+		flt if pa.types.is_floating(field.type) else cint if pa.types.is_integer(field.type) else cstr
+		for field in schema
+	]
+
+	count = 0
+	with pq.ParquetWriter(path, schema, compression="snappy") as writer:
+		for rows in chunks:
+			columns = list(zip(*rows))
+			writer.write_table(pa.table({
+				field.name: pa.array([None if v is None else convert(v) for v in columns[i]], type=field.type)
+				for i, (field, convert) in enumerate(zip(schema, converters))
+			}, schema=schema))
+			count += len(rows)
+	return count
+
+def get_parquet_schema(pa, doctype, fields):
+	"""Arrow schema: numbers for Currency/Float/Int/Check fields, strings for everything else"""
+	meta = frappe.get_meta(doctype)
+	types = []
+	for fieldname in fields:
+		df = meta.get_field(fieldname)
+		fieldtype = df.fieldtype if df else ("Int" if fieldname == "docstatus" else "Data")
+		if fieldtype in ("Currency", "Float", "Percent"):
+			types.append(pa.float64())
+		elif fieldtype in ("Int", "Check"):
+			types.append(pa.int64())
+		else:
+			types.append(pa.string())
+	return pa.schema(list(zip(fields, types)))
@@ -0,0 +1,125 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+"""
+Precomputed period boundaries for quarterly and annual PO limits.
+
+Each company's Fiscal Years are turned once into a table of (year, quarters) boundaries and
+kept in the cache until a Fiscal Year changes. Resolving the period of a date is then a
+lookup in that table. Usage for the month, quarter and year comes from the PO Monthly Spend
+rollup in one query, so quarterly and annual limits add no scans of Purchase Orders.
+"""
+
+import frappe
+from frappe.utils import add_days, add_months, flt, get_first_day, get_last_day, getdate, today
+
+PERIOD_CACHE_KEY = "po_limit_fiscal_periods"
+
+def get_period_boundaries(company, date=None):
+	"""
+	Month, fiscal quarter and fiscal year containing `date` for a company.
+	Falls back to the calendar year when no Fiscal Year covers the date.
+
+	Returns:
+		frappe._dict with fiscal_year, month_start, month_end, quarter_start, quarter_end,
+		year_start and year_end
+	"""
+	date = getdate(date or today())
+
+	year = next((y for y in get_period_table(company) if y["year_start"] <= date <= y["year_end"]), None)
+	if not year:
+		year = build_year(None, getdate(f"{date.year}-01-01"), getdate(f"{date.year}-12-31"))
+
+	quarter_start, quarter_end = next(q for q in year["quarters"] if q[0] <= date <= q[1])
+
+	return frappe._dict({
+		"fiscal_year": year["fiscal_year"],
+		"month_start": get_first_day(date),
+		"month_end": get_last_day(date),
+		"quarter_start": quarter_start,
+		"quarter_end": quarter_end,
+		"year_start": year["year_start"],
+		"year_end": year["year_end"]
+	})
+
+def get_period_table(company):
+	"""Cached fiscal year and quarter boundaries of a company"""
+	return frappe.cache().hget(PERIOD_CACHE_KEY, company or "",
+		generator=lambda: build_period_table(company))
+
+def build_period_table(company):
+	"""Fiscal years that apply to the company (or to all companies), with their quarters"""
+	if not frappe.db.table_exists("Fiscal Year"):
+		return []
+
+	rows = frappe.db.sql("""
+		SELECT fy.name, fy.year_start_date, fy.year_end_date
+		FROM `tabFiscal Year` fy
+		WHERE fy.disabled = 0
+		AND (
+			NOT EXISTS (SELECT 1 FROM `tabFiscal Year Company` c WHERE c.parent = fy.name)
+			OR EXISTS (SELECT 1 FROM `tabFiscal Year Company` c WHERE c.parent = fy.name AND c.company = %s)
+		)
+		ORDER BY fy.year_start_date
+	""", (company,))
+
+	return [build_year(name, getdate(start), getdate(end)) for name, start, end in rows]
+
+def build_year(fiscal_year, year_start, year_end):
+	"""Split a fiscal year into four quarters; the last quarter ends with the year"""
+	quarters = []
+	for i in range(4):
+		start = add_months(year_start, 3 * i)
+		end = year_end if i == 3 else add_days(add_months(year_start, 3 * (i + 1)), -1)
+		quarters.append((getdate(start), getdate(end)))
+
+	return {"fiscal_year": fiscal_year, "year_start": year_start, "year_end": year_end, "quarters": quarters}
+
+def get_period_usage(user, company, date=None):
+	"""
+	Month, quarter and year usage of a user from the PO Monthly Spend rollup, in one query.
+	Ledger entries of sharded limits not yet folded into the rollup are added in the same query.
+	Rollup rows are per calendar month, so a month is counted in the period its first day
+	falls in. This is exact for fiscal years that start on the first of a month.
+	"""
+	periods = get_period_boundaries(company, date)
+
+	usage = frappe.db.sql("""
+		SELECT
+			SUM(CASE WHEN month = %(month)s THEN amount ELSE 0 END),
+			SUM(CASE WHEN month BETWEEN %(quarter_start)s AND %(quarter_end)s THEN amount ELSE 0 END),
+			SUM(amount)
+		FROM (
+			SELECT month, amount
+			FROM `tabPO Monthly Spend`
+			WHERE user = %(user)s
+			AND company = %(company)s
+			AND month BETWEEN %(year_start)s AND %(year_end)s
+			UNION ALL
+			SELECT month, amount
+			FROM `tabPO Usage Ledger Entry`
+			WHERE user = %(user)s
+			AND company = %(company)s
+			AND month BETWEEN %(year_start)s AND %(year_end)s
+			AND pending_rollup = 1
+		) AS spend
+	""", {
+		"user": user,
+		"company": company,
+		"month": periods.month_start,
+		"quarter_start": periods.quarter_start,
+		"quarter_end": periods.quarter_end,
+		"year_start": periods.year_start,
+		"year_end": periods.year_end
+	})[0]
+
+	return frappe._dict({
+		"periods": periods,
+		"month": flt(usage[0]),
+		"quarter": flt(usage[1]),
+		"year": flt(usage[2])
+	})
+
+def clear_period_cache(doc=None, method=None):
+	"""Drop the cached boundaries when a Fiscal Year changes"""
+	frappe.cache().delete_value(PERIOD_CACHE_KEY)
@@ -0,0 +1,87 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+"""
+Per-session snapshot of a user's PO limits and headroom across all their companies.
+
+The snapshot is built with one query (limits joined to this month's spend rollup) and cached
+per user and session for the month, for at most SNAPSHOT_TTL seconds. The Purchase Order form
+fetches it once and resolves company switches locally, and the validate step reads limits from
+the same snapshot. The final check on submit always reads the limit from the database.
+Any change to the user's limits or usage drops every cached snapshot of that user, both at once
+and again after the change commits, so a snapshot rebuilt from pre-commit data doesn't survive.
+"""
+
+import frappe
+from frappe.utils import flt, get_first_day, getdate, today
+
+SNAPSHOT_CACHE_KEY = "po_limit_snapshot"
+
+# Seconds a user's snapshots live after the last rebuild; also bounds the per-session entries
+SNAPSHOT_TTL = 60 * 60
+
+@frappe.whitelist()
+def get_limit_snapshot():
+	"""Limits and headroom of the session user for every company, as {company: limit}"""
+	return get_snapshot(frappe.session.user)
+
+def get_snapshot(user):
+	"""Cached snapshot of a user's limits for the current session and month"""
+	cache = frappe.cache()
+	key = get_cache_key(user)
+	sid = str(frappe.session.sid)
+	month = get_first_day(getdate(today()))
+
+	cached = cache.hget(key, sid)
+	if cached and cached["month"] == month:
+		return cached["limits"]
+
+	limits = build_snapshot(user, month)
+	cache.hset(key, sid, {"month": month, "limits": limits})
+	cache.expire(cache.make_key(key), SNAPSHOT_TTL)
+	return limits
+
+def get_company_limit(user, company):
+	"""One company's entry of the user's snapshot, or None if the user has no limit there"""
+	limit = get_snapshot(user).get(company)
+	return frappe._dict(limit) if limit else None
+
+def build_snapshot(user, month):
+	"""All of a user's limits with this month's rollup usage, in one query"""
+	rows = frappe.db.sql("""
+		SELECT l.company, l.name, l.status, l.per_po_limit, l.per_month_limit,
+			l.per_quarter_limit, l.per_year_limit, l.usage_shards, l.last_reset_date,
+			IFNULL(s.amount, 0) AS monthly_usage
+		FROM `tabUser PO Limit` l
+		LEFT JOIN `tabPO Monthly Spend` s
+			ON s.user = l.user AND s.company = l.company AND s.month = %(month)s
+		WHERE l.user = %(user)s
+	""", {"user": user, "month": month}, as_dict=1)
+
+	snapshot = {}
+	for row in rows:
+		per_month_limit = flt(row.per_month_limit)
+		row.monthly_headroom = max(per_month_limit - flt(row.monthly_usage), 0) if per_month_limit > 0 else None
+		snapshot[row.pop("company")] = row
+
+	return snapshot
+
+def get_cache_key(user):
+	return f"{SNAPSHOT_CACHE_KEY}|{user}"
+
+def clear_limit_snapshot(users):
+	"""Drop the cached snapshots of one or more users, for all their sessions"""
+	if isinstance(users, str):
+		users = [users]
+
+	keys = [get_cache_key(user) for user in set(users)]
+	frappe.cache().delete_value(keys)
+	frappe.db.after_commit.add(lambda: frappe.cache().delete_value(keys))
+
+def clear_snapshot_on_limit_change(doc, method=None):
+	"""User PO Limit hook"""
+	clear_limit_snapshot(doc.user)
+
+def clear_snapshot_on_usage_change(doc, method=None):
+	"""Purchase Order submit and cancel hook; usage is attributed to the owner"""
+	clear_limit_snapshot([doc.owner, frappe.session.user])
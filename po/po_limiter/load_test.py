@@ -0,0 +1,221 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+"""
+Concurrent-submit load test for the PO limiter.
+
+Simulated buyers submit copies of a template Purchase Order in parallel against a local site.
+The run reports submits per second, p50/p95/p99 latency of `validate_po_limits`, InnoDB row
+lock waits, and whether any buyer ended the month over their Per Month Limit. To measure
+sharding, run it once with the buyers' Usage Shards at 0 and once at 8 and compare the row lock
+waits; sharded submits leave their rollup update pending for the background fold.
+
+Usage (creates and submits real Purchase Orders, so only run it on a test site):
+
+	bench --site test_site set-config allow_tests true
+	bench --site test_site execute po.po_limiter.load_test.run --kwargs "{
+		'template': 'PUR-ORD-2026-00001',
+		'buyers': ['buyer1@example.com', 'buyer2@example.com'],
+		'submits_per_buyer': 100,
+		'workers': 8,
+		'mode': 'thread'
+	}"
+"""
+
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import frappe
+from frappe.utils import flt, get_first_day, get_last_day, today
+
+from po.po_limiter.po_validation import POLimitExceededError
+
+def run(template, buyers=None, submits_per_buyer=50, workers=4, mode="thread"):
+	"""
+	Run the load test and print a summary.
+
+	Args:
+		template: Name of a Purchase Order to copy for every submit
+		buyers: Users to submit as (default: the template's owner)
+		submits_per_buyer: Purchase Orders each buyer submits
+		workers: Size of the thread or process pool
+		mode: "thread" or "process"
+	"""
+	if not (frappe.conf.allow_tests or frappe.conf.developer_mode):
+		frappe.throw("The load test submits real Purchase Orders. Enable allow_tests or developer_mode on the site first.")
+
+	template_doc = frappe.get_doc("Purchase Order", template)
+	buyers = frappe.parse_json(buyers) if isinstance(buyers, str) else buyers
+	buyers = buyers or [template_doc.owner]
+
+	# One task per submit, so every buyer competes for the pool at the same time
+	tasks = [(frappe.local.site, frappe.local.sites_path, buyer, template)
+		for _ in range(int(submits_per_buyer)) for buyer in buyers]
+
+	if mode == "process":
+		executor = ProcessPoolExecutor(max_workers=int(workers), mp_context=multiprocessing.get_context("spawn"))
+	else:
+		executor = ThreadPoolExecutor(max_workers=int(workers))
+
+	locks_before = get_row_lock_status()
+	started = time.monotonic()
+	with executor:
+		results = list(executor.map(submit_one, tasks))
+	elapsed = time.monotonic() - started
+	locks_after = get_row_lock_status()
+
+	summary = summarize(results, elapsed, locks_before, locks_after)
+	summary["over_limit"] = get_users_over_limit(buyers, template_doc.company)
+	summary["rollup_pending"] = frappe.db.count("PO Usage Ledger Entry", {"pending_rollup": 1})
+
+	print_summary(summary)
+	return summary
+
+def submit_one(task):
+	"""Submit one copy of the template as `buyer` on a fresh connection"""
+	site, sites_path, buyer, template = task
+
+	result = {"status": "submitted", "hook_timings": [], "latency": 0}
+	try:
+		frappe.init(site=site, sites_path=sites_path)
+		frappe.connect()
+		patch_hook_timer()
+
+		frappe.set_user(buyer)
+		frappe.local.po_hook_timings = result["hook_timings"]
+
+		po = frappe.copy_doc(frappe.get_doc("Purchase Order", template))
+		po.transaction_date = today()
+		po.schedule_date = today()
+		for item in po.items:
+			item.schedule_date = today()
+
+		started = time.monotonic()
+		po.insert()
+		po.submit()
+		frappe.db.commit()
+		result["latency"] = time.monotonic() - started
+	except (frappe.QueryDeadlockError, frappe.QueryTimeoutError):
+		frappe.db.rollback()
+		result["status"] = "lock_error"
+	except POLimitExceededError:
+		frappe.db.rollback()
+		result["status"] = "rejected"
+	except frappe.ValidationError as e:
+		# Not a limit decision (mandatory fields, links, duplicates, ...), so kept apart
+		frappe.db.rollback()
+		result["status"] = "invalid"
+		result["error"] = str(e)
+	except Exception as e:
+		# Counted instead of raised, so one broken task doesn't abort the run and its summary
+		if getattr(frappe.local, "db", None):
+			frappe.db.rollback()
+		result["status"] = "error"
+		result["error"] = f"{type(e).__name__}: {e}"
+	finally:
+		frappe.destroy()
+
+	return result
+
+def patch_hook_timer():
+	"""Wrap validate_po_limits so every call records its duration on frappe.local"""
+	from po.po_limiter import po_validation
+
+	if getattr(po_validation.validate_po_limits, "is_timed", False):
+		return
+
+	validate_po_limits = po_validation.validate_po_limits
+
+	def timed_validate_po_limits(doc, method=None):
+		started = time.monotonic()
+		try:
+			return validate_po_limits(doc, method)
+		finally:
+			timings = getattr(frappe.local, "po_hook_timings", None)
+			if timings is not None:
+				timings.append(time.monotonic() - started)
+
+	timed_validate_po_limits.is_timed = True
+	po_validation.validate_po_limits = timed_validate_po_limits
+
+def get_row_lock_status():
+	"""Server-wide InnoDB row lock counters (include any other traffic on the server)"""
+	return {name: flt(value) for name, value in frappe.db.sql("SHOW GLOBAL STATUS LIKE 'Innodb_row_lock%'")}
+
+def get_users_over_limit(buyers, company):
+	"""Buyers whose submitted POs this month exceed their Per Month Limit"""
+	rows = frappe.db.sql("""
+		SELECT l.user, l.per_month_limit, SUM(po.base_grand_total) AS submitted
+		FROM `tabUser PO Limit` l
+		INNER JOIN `tabPurchase Order` po
+			ON po.owner = l.user AND po.company = l.company
+		WHERE l.user IN %(buyers)s
+		AND l.company = %(company)s
+		AND l.per_month_limit > 0
+		AND po.docstatus = 1
+		AND po.transaction_date BETWEEN %(from_date)s AND %(to_date)s
+		GROUP BY l.user, l.per_month_limit
+		HAVING submitted > l.per_month_limit
+	""", {
+		"buyers": tuple(buyers),
+		"company": company,
+		"from_date": get_first_day(today()),
+		"to_date": get_last_day(today())
+	}, as_dict=1)
+	return rows
+
+def percentile(values, pct):
+	"""Nearest-rank percentile of a list of numbers"""
+	if not values:
+		return 0
+	values = sorted(values)
+	index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values))) - 1))
+	return values[index]
+
+def summarize(results, elapsed, locks_before, locks_after):
+	hook_timings = [t for r in results for t in r["hook_timings"]]
+	submitted = [r for r in results if r["status"] == "submitted"]
+
+	return {
+		"attempts": len(results),
+		"submitted": len(submitted),
+		"rejected": sum(1 for r in results if r["status"] == "rejected"),
+		"lock_errors": sum(1 for r in results if r["status"] == "lock_error"),
+		"invalid": sum(1 for r in results if r["status"] == "invalid"),
+		"errors": sum(1 for r in results if r["status"] == "error"),
+		"error_samples": sorted({r["error"] for r in results if r.get("error")})[:5],
+		"elapsed": elapsed,
+		"submits_per_second": len(submitted) / elapsed if elapsed else 0,
+		"hook_p50_ms": percentile(hook_timings, 50) * 1000,
+		"hook_p95_ms": percentile(hook_timings, 95) * 1000,
+		"hook_p99_ms": percentile(hook_timings, 99) * 1000,
+		"submit_p50_ms": percentile([r["latency"] for r in submitted], 50) * 1000,
+		"submit_p99_ms": percentile([r["latency"] for r in submitted], 99) * 1000,
+		"row_lock_waits": locks_after.get("Innodb_row_lock_waits", 0) - locks_before.get("Innodb_row_lock_waits", 0),
+		"row_lock_time_ms": locks_after.get("Innodb_row_lock_time", 0) - locks_before.get("Innodb_row_lock_time", 0)
+	}
+
+def print_summary(summary):
+	print("PO limiter load test")
+	print(f"  Attempts:          {summary['attempts']}")
+	print(f"  Submitted:         {summary['submitted']}")
+	print(f"  Rejected (limit):  {summary['rejected']}")
+	print(f"  Lock errors:       {summary['lock_errors']}")
+	print(f"  Invalid (other):   {summary['invalid']}")
+	print(f"  Errors:            {summary['errors']}")
+	for error in summary["error_samples"]:
+		print(f"    {error}")
+	print(f"  Elapsed:           {summary['elapsed']:.2f}s")
+	print(f"  Submits/second:    {summary['submits_per_second']:.2f}")
+	print(f"  Hook p50/p95/p99:  {summary['hook_p50_ms']:.1f} / {summary['hook_p95_ms']:.1f} / {summary['hook_p99_ms']:.1f} ms")
+	print(f"  Submit p50/p99:    {summary['submit_p50_ms']:.1f} / {summary['submit_p99_ms']:.1f} ms")
+	print(f"  Row lock waits:    {summary['row_lock_waits']:.0f} ({summary['row_lock_time_ms']:.0f} ms)")
+	print(f"  Rollup pending:    {summary['rollup_pending']}")
+
+	if summary["over_limit"]:
+		print("  OVER LIMIT:")
+		for row in summary["over_limit"]:
+			print(f"    {row.user}: submitted {flt(row.submitted)} > limit {flt(row.per_month_limit)}")
+	else:
+		print("  No buyer ended the month over their Per Month Limit")
@@ -86,6 +86,8 @@ function setup_event_handlers(page) {
 		var status = container.find('#limit-status').val();
 		var per_po_limit = container.find('#per-po-limit').val();
 		var per_month_limit = container.find('#per-month-limit').val();
+		var per_quarter_limit = container.find('#per-quarter-limit').val() || 0;
+		var per_year_limit = container.find('#per-year-limit').val() || 0;
 
 		if (!user || !company) {
 			frappe.msgprint('Please select a user and company');
@@ -100,6 +102,8 @@ function setup_event_handlers(page) {
 				company: company,
 				per_po_limit: per_po_limit,
 				per_month_limit: per_month_limit,
+				per_quarter_limit: per_quarter_limit,
+				per_year_limit: per_year_limit,
 				status: status
 			},
 			callback: function(r) {
@@ -116,6 +120,8 @@ function setup_event_handlers(page) {
 		container.find('#limit-status').val('Active');
 		container.find('#per-po-limit').val('0');
 		container.find('#per-month-limit').val('0');
+		container.find('#per-quarter-limit').val('0');
+		container.find('#per-year-limit').val('0');
 		container.find('#current-usage').hide();
 	});
 
@@ -201,6 +207,8 @@ function load_user_limit(user, company) {
 				container.find('#limit-status').val(limit.status || 'Active');
 				container.find('#per-po-limit').val(limit.per_po_limit || 0);
 				container.find('#per-month-limit').val(limit.per_month_limit || 0);
+				container.find('#per-quarter-limit').val(limit.per_quarter_limit || 0);
+				container.find('#per-year-limit').val(limit.per_year_limit || 0);
 
 				// Show current usage
 				if (limit.monthly_usage) {
@@ -216,6 +224,8 @@ function load_user_limit(user, company) {
 				container.find('#limit-status').val('Active');
 				container.find('#per-po-limit').val(0);
 				container.find('#per-month-limit').val(0);
+				container.find('#per-quarter-limit').val(0);
+				container.find('#per-year-limit').val(0);
 				container.find('#current-usage').hide();
 				container.find('#limit-editor').show();
 			}
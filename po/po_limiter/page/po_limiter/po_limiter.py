@@ -3,7 +3,15 @@
 
 import frappe
 from frappe import _
+from frappe.utils import get_first_day, today
 
+from po.po_limiter import permissions
+from po.po_limiter.audit import log_limit_change
+from po.po_limiter.limit_snapshot import clear_limit_snapshot
+from po.po_limiter.permissions import PO_CREATOR_ROLES, has_md_access
+from po.po_limiter.usage_shards import get_usage_for_limits
+
+@frappe.read_only()
 def get_context(context):
 	"""Get context for the PO Limiter page"""
 	# Ensure only MD can access this page
@@ -29,52 +37,55 @@ def get_context(context):
 
 
 @frappe.whitelist()
+@frappe.read_only()
 def get_purchase_users():
 	"""Get all users who have access to create Purchase Orders"""
-	# Get users with Purchase Order create permission
-	users = frappe.get_all("User", filters={
-		"enabled": 1,
-		"user_type": "System User"
-	}, fields=["name", "full_name", "email"])
-
-	purchase_users = []
-	for user in users:
-		if has_po_create_permission(user.name):
-			purchase_users.append(user)
+	if not has_md_access():
+		frappe.throw(_("You don't have permission to access this information."), frappe.PermissionError)
 
-	return purchase_users
+	# Resolve the role check for every user in one query instead of one per user
+	return frappe.db.sql("""
+		SELECT DISTINCT u.name, u.full_name, u.email, u.modified
+		FROM `tabUser` u
+		INNER JOIN `tabHas Role` r
+			ON r.parent = u.name AND r.parenttype = 'User'
+		WHERE u.enabled = 1
+		AND u.user_type = 'System User'
+		AND r.role IN %(roles)s
+		ORDER BY u.modified DESC
+	""", {"roles": PO_CREATOR_ROLES}, as_dict=1)
 
 
 @frappe.whitelist()
 def has_po_create_permission(user=None):
 	"""Check if user has permission to create Purchase Orders"""
-	if not user:
-		user = frappe.session.user
-
-	# Check if user has "Purchase Order Creator" or "Purchase Order Manager" role
-	# or has create permission on Purchase Order
-	has_role = frappe.db.exists("Has Role", {
-		"parent": user,
-		"role": ["in", ["Purchase Order Creator", "Purchase Order Manager", "System Manager", "Managing Director"]]
-	})
-
-	return has_role
+	return permissions.has_po_create_permission(user)
 
 
 @frappe.whitelist()
+@frappe.read_only()
 def get_all_user_limits():
 	"""Get all user PO limits"""
+	if not has_md_access():
+		frappe.throw(_("You don't have permission to access this information."), frappe.PermissionError)
+
 	limits = frappe.get_all("User PO Limit",
 		fields=["name", "user", "company", "status", "per_po_limit", "per_month_limit",
-				"monthly_usage", "last_reset_date", "last_updated_by", "last_updated_date"],
+				"per_quarter_limit", "per_year_limit", "monthly_usage", "last_reset_date", "last_updated_by", "last_updated_date",
+				"usage_shards"],
 		order_by="user, company"
 	)
+	set_current_usage(limits)
 	return limits
 
 
 @frappe.whitelist()
+@frappe.read_only()
 def get_pending_limit_requests():
 	"""Get all pending PO limit increase requests"""
+	if not has_md_access():
+		frappe.throw(_("You don't have permission to access this information."), frappe.PermissionError)
+
 	requests = frappe.get_all("PO Limit Increase Request",
 		filters={"status": "Pending Approval"},
 		fields=["name", "user", "company", "requested_per_po_limit", "requested_per_month_limit",
@@ -84,41 +95,55 @@ def get_pending_limit_requests():
 
 
 @frappe.whitelist()
-def update_user_limit(user, company, per_po_limit, per_month_limit, status):
-	"""Update or create user PO limit"""
+def update_user_limit(user, company, per_po_limit, per_month_limit, status,
+		per_quarter_limit=None, per_year_limit=None):
+	"""
+	Update or create user PO limit.
+	Per Quarter and Per Year limits are only changed when passed, so older callers keep them.
+	"""
 	if not has_md_access():
 		frappe.throw(_("You don't have permission to perform this action."), frappe.PermissionError)
 
+	values = {
+		"status": status,
+		"per_po_limit": per_po_limit,
+		"per_month_limit": per_month_limit
+	}
+	if per_quarter_limit is not None:
+		values["per_quarter_limit"] = per_quarter_limit
+	if per_year_limit is not None:
+		values["per_year_limit"] = per_year_limit
+
 	# Check if limit exists
-	exists = frappe.db.exists("User PO Limit", {"user": user, "company": company})
+	existing = frappe.db.get_value("User PO Limit", {"user": user, "company": company},
+		["name", "status", "per_po_limit", "per_month_limit", "per_quarter_limit", "per_year_limit"], as_dict=1)
 
-	if exists:
+	if existing:
 		# Update existing limit
-		frappe.db.set_value("User PO Limit", exists, {
-			"per_po_limit": per_po_limit,
-			"per_month_limit": per_month_limit,
-			"status": status,
-			"last_updated_by": frappe.session.user,
-			"last_updated_date": frappe.utils.now()
-		})
+		frappe.db.set_value("User PO Limit", existing.name, dict(values,
+			last_updated_by=frappe.session.user,
+			last_updated_date=frappe.utils.now()
+		))
+		log_limit_change(user, company, existing, values, "Dashboard", user_po_limit=existing.name)
+		clear_limit_snapshot(user)
 	else:
 		# Create new limit
-		frappe.get_doc({
-			"doctype": "User PO Limit",
-			"user": user,
-			"company": company,
-			"per_po_limit": per_po_limit,
-			"per_month_limit": per_month_limit,
-			"status": status,
-			"monthly_usage": 0,
-			"last_reset_date": frappe.utils.today()
-		}).insert()
+		limit = frappe.get_doc(dict(values,
+			doctype="User PO Limit",
+			user=user,
+			company=company,
+			monthly_usage=0,
+			last_reset_date=frappe.utils.today()
+		))
+		limit.flags.audit_source = "Dashboard"
+		limit.insert()
 
 	frappe.msgprint(_("PO Limit updated for {0}").format(user))
 	return {"success": True}
 
 
 @frappe.whitelist()
+@frappe.read_only()
 def get_user_limit_details(user, company):
 	"""Get user limit details for editing"""
 	if not has_md_access():
@@ -126,26 +151,37 @@ def get_user_limit_details(user, company):
 
 	limit = frappe.db.get_value("User PO Limit",
 		{"user": user, "company": company},
-		["name", "per_po_limit", "per_month_limit", "status", "monthly_usage",
-		 "last_reset_date", "last_updated_by", "last_updated_date"],
+		["name", "user", "company", "per_po_limit", "per_month_limit", "per_quarter_limit", "per_year_limit",
+		 "status", "monthly_usage",
+		 "last_reset_date", "last_updated_by", "last_updated_date", "usage_shards"],
 		as_dict=1
 	)
 
-	return limit
-
+	if limit:
+		set_current_usage([limit])
 
-def has_md_access():
-	"""Check if current user has MD access"""
-	# Check for Managing Director role
-	has_md_role = frappe.db.exists("Has Role", {
-		"parent": frappe.session.user,
-		"role": "Managing Director"
-	})
+	return limit
 
-	# Also allow System Manager
-	has_sm_role = frappe.db.exists("Has Role", {
-		"parent": frappe.session.user,
-		"role": "System Manager"
-	})
 
-	return has_md_role or has_sm_role
+def set_current_usage(limits):
+	"""
+	Replace monthly_usage with this month's usage: the shard total for limits in sharded mode,
+	and the PO Monthly Spend rollup for everyone else
+	"""
+	month = get_first_day(today())
+	users = list({limit.user for limit in limits if not limit.usage_shards})
+	spend = {}
+	if users:
+		spend = {(row.user, row.company): row.amount for row in frappe.get_all("PO Monthly Spend",
+			filters={"month": month, "user": ["in", users]},
+			fields=["user", "company", "amount"]
+		)}
+
+	sharded = [limit.name for limit in limits if limit.usage_shards]
+	usage = get_usage_for_limits(sharded, month) if sharded else {}
+
+	for limit in limits:
+		if limit.usage_shards:
+			limit.monthly_usage = usage.get(limit.name, 0)
+		else:
+			limit.monthly_usage = spend.get((limit.user, limit.company), 0)
@@ -0,0 +1,29 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+import frappe
+
+# Roles that can manage PO limits
+MD_ROLES = ("Managing Director", "System Manager")
+
+# Roles that can create Purchase Orders
+PO_CREATOR_ROLES = ("Purchase Order Creator", "Purchase Order Manager", "System Manager", "Managing Director")
+
+LIMITER_ROLES = tuple(sorted(set(MD_ROLES) | set(PO_CREATOR_ROLES)))
+
+def get_limiter_roles(user=None):
+	"""
+	Get the limiter-relevant roles of a user.
+	Built on frappe.get_roles, which is cached per user and invalidated by Frappe when the user's
+	roles change, so no separate cache has to be kept in sync.
+	"""
+	user = user or frappe.session.user
+	return set(frappe.get_roles(user)) & set(LIMITER_ROLES)
+
+def has_md_access(user=None):
+	"""Check if user (default: current user) has MD access"""
+	return bool(get_limiter_roles(user) & set(MD_ROLES))
+
+def has_po_create_permission(user=None):
+	"""Check if user (default: current user) can create Purchase Orders"""
+	return bool(get_limiter_roles(user) & set(PO_CREATOR_ROLES))
@@ -3,7 +3,14 @@
 
 import frappe
 from frappe import _
-from frappe.utils import flt, getdate, today
+from frappe.utils import cint, flt, get_first_day, getdate, now, today
+
+from po.po_limiter.limit_snapshot import get_company_limit
+from po.po_limiter.usage_ledger import is_replay
+
+class POLimitExceededError(frappe.ValidationError):
+	"""A Purchase Order was blocked by the submitting user's PO limits"""
+	pass
 
 def validate_po_limits(doc, method=None):
 	"""
@@ -21,6 +28,10 @@ def validate_po_limits(doc, method=None):
 	if doc.docstatus == 2:
 		return
 
+	# This PO's submit is already counted; a replayed on_submit must not count it again
+	if method == "on_submit" and is_replay(doc):
+		return
+
 	# Only validate on SUBMIT (docstatus == 1), not on save as draft (docstatus == 0)
 	# This allows users to save POs as draft without limits
 	if doc.docstatus == 0 and method != "on_submit":
@@ -44,27 +55,43 @@ def validate_po_limits(doc, method=None):
 		return
 
 	# Get user's PO limits
-	user_limit = get_user_po_limit(user, company)
+	# The final check on submit never trusts a cached limit
+	user_limit = get_user_po_limit(user, company, live=method == "on_submit")
 
 	if not user_limit:
 		# No limit set - block submission
 		frappe.throw(
 			_("PO submission requires MD approval. Please request a PO submission limit."),
 			title=_("PO Limit Restriction"),
-			exc=frappe.ValidationError
+			exc=POLimitExceededError
 		)
 
+	# Sharded limits leave the monthly spend rollup to a background fold, see spend.defer_spend
+	if method == "on_submit":
+		doc.flags.po_usage_sharded = cint(user_limit.get("usage_shards")) > 0
+
 	# Validate Per PO Limit
 	validate_per_po_limit(po_amount, user_limit, doc.name)
 
 	# Validate Per Month Limit (only on submit)
-	validate_per_month_limit(po_amount, user_limit, user, company, doc.name)
+	validate_per_month_limit(po_amount, user_limit, user, company, doc.name,
+		method=method, posting_date=doc.transaction_date)
+
+	# Validate Per Quarter and Per Year limits of the company's fiscal periods
+	validate_fiscal_period_limits(po_amount, user_limit, user, company, posting_date=doc.transaction_date)
+
+def get_user_po_limit(user, company, live=False):
+	"""
+	Get user's PO limit for the specified company.
+	The session user's limit comes from their cached multi-company snapshot unless `live` is set.
+	"""
+	if user == frappe.session.user and not live:
+		return get_company_limit(user, company)
 
-def get_user_po_limit(user, company):
-	"""Get user's PO limit for the specified company"""
 	limits = frappe.db.get_value("User PO Limit",
 		{"user": user, "company": company},
-		["per_po_limit", "per_month_limit", "monthly_usage", "last_reset_date", "name", "status"],
+		["per_po_limit", "per_month_limit", "per_quarter_limit", "per_year_limit", "monthly_usage",
+		 "last_reset_date", "name", "status", "usage_shards", "user", "company"],
 		as_dict=1
 	)
 
@@ -79,7 +106,7 @@ def validate_per_po_limit(po_amount, user_limit, po_name):
 		frappe.throw(
 			_("PO submission requires MD approval."),
 			title=_("PO Limit Restriction"),
-			exc=frappe.ValidationError
+			exc=POLimitExceededError
 		)
 
 	per_po_limit = flt(user_limit.get("per_po_limit", 0))
@@ -88,7 +115,7 @@ def validate_per_po_limit(po_amount, user_limit, po_name):
 		frappe.throw(
 			_("PO submission requires MD approval."),
 			title=_("PO Limit Restriction"),
-			exc=frappe.ValidationError
+			exc=POLimitExceededError
 		)
 
 	if po_amount > per_po_limit:
@@ -99,10 +126,10 @@ def validate_per_po_limit(po_amount, user_limit, po_name):
 				frappe.format_value(po_amount - per_po_limit, dict(fieldtype="Currency"))
 			),
 			title=_("PO Limit Restriction"),
-			exc=frappe.ValidationError
+			exc=POLimitExceededError
 		)
 
-def validate_per_month_limit(po_amount, user_limit, user, company, po_name):
+def validate_per_month_limit(po_amount, user_limit, user, company, po_name, method=None, posting_date=None):
 	"""Validate Per Month limit - only if monthly limit is set (greater than 0)"""
 	# Check if status is Revoked
 	status = user_limit.get("status", "Revoked")
@@ -111,7 +138,7 @@ def validate_per_month_limit(po_amount, user_limit, user, company, po_name):
 		frappe.throw(
 			_("PO submission requires MD approval."),
 			title=_("PO Limit Restriction"),
-			exc=frappe.ValidationError
+			exc=POLimitExceededError
 		)
 
 	per_month_limit = flt(user_limit.get("per_month_limit", 0))
@@ -121,53 +148,116 @@ def validate_per_month_limit(po_amount, user_limit, user, company, po_name):
 	if per_month_limit <= 0:
 		return
 
+	# High-volume users keep usage in sharded counters instead of monthly_usage
+	if cint(user_limit.get("usage_shards")) > 0:
+		validate_sharded_month_limit(po_amount, user_limit, method, posting_date)
+		return
+
 	# Get current month's usage
 	monthly_usage = get_monthly_po_usage(user, company)
 
 	# Include current PO in the calculation
-	total_with_current = monthly_usage + po_amount
+	if monthly_usage + po_amount > per_month_limit:
+		throw_monthly_limit_exceeded(po_amount, per_month_limit, monthly_usage)
 
-	if total_with_current > per_month_limit:
-		frappe.throw(
-			_("Monthly PO Amount ({0}) exceeds your Per Month Limit ({1}). Your current monthly usage: {2}. This PO: {3}. Please request MD approval.").format(
-				frappe.format_value(total_with_current, dict(fieldtype="Currency")),
-				frappe.format_value(per_month_limit, dict(fieldtype="Currency")),
-				frappe.format_value(monthly_usage, dict(fieldtype="Currency")),
-				frappe.format_value(po_amount, dict(fieldtype="Currency"))
-			),
-			title=_("PO Limit Restriction"),
-			exc=frappe.ValidationError
-		)
+	# Usage only changes on submit; validate just checks
+	if method == "on_submit":
+		update_monthly_usage(user_limit["name"], po_amount, posting_date)
 
-	# Update monthly usage
-	update_monthly_usage(user_limit["name"], monthly_usage + po_amount)
+def validate_sharded_month_limit(po_amount, user_limit, method, posting_date):
+	"""
+	Validate Per Month limit against the limit's usage shards.
+	Usage is only reserved on submit; validate just checks the current total.
+	"""
+	from po.po_limiter import usage_shards
+
+	per_month_limit = flt(user_limit.get("per_month_limit", 0))
+	period = get_first_day(getdate(posting_date or today()))
+
+	if method != "on_submit":
+		monthly_usage = usage_shards.get_usage(user_limit["name"], period)
+		if monthly_usage + po_amount > per_month_limit:
+			throw_monthly_limit_exceeded(po_amount, per_month_limit, monthly_usage)
+		return
+
+	reserved, monthly_usage = usage_shards.reserve_usage(user_limit, period, po_amount)
+	if not reserved:
+		throw_monthly_limit_exceeded(po_amount, per_month_limit, monthly_usage)
+
+def validate_fiscal_period_limits(po_amount, user_limit, user, company, posting_date=None):
+	"""Validate Per Quarter and Per Year limits - only those set (greater than 0)"""
+	per_quarter_limit = flt(user_limit.get("per_quarter_limit", 0))
+	per_year_limit = flt(user_limit.get("per_year_limit", 0))
+
+	if per_quarter_limit <= 0 and per_year_limit <= 0:
+		return
+
+	from po.po_limiter.fiscal_periods import get_period_usage
+
+	usage = get_period_usage(user, company, posting_date)
+
+	if per_quarter_limit > 0 and usage.quarter + po_amount > per_quarter_limit:
+		throw_period_limit_exceeded(_("Quarterly"), _("Per Quarter Limit"), po_amount, per_quarter_limit, usage.quarter)
+
+	if per_year_limit > 0 and usage.year + po_amount > per_year_limit:
+		throw_period_limit_exceeded(_("Annual"), _("Per Year Limit"), po_amount, per_year_limit, usage.year)
+
+def throw_period_limit_exceeded(period_label, limit_label, po_amount, limit, usage):
+	"""Raise the Per Quarter or Per Year limit error"""
+	frappe.throw(
+		_("{0} PO Amount ({1}) exceeds your {2} ({3}). Your current usage: {4}. This PO: {5}. Please request MD approval.").format(
+			period_label,
+			frappe.format_value(usage + po_amount, dict(fieldtype="Currency")),
+			limit_label,
+			frappe.format_value(limit, dict(fieldtype="Currency")),
+			frappe.format_value(usage, dict(fieldtype="Currency")),
+			frappe.format_value(po_amount, dict(fieldtype="Currency"))
+		),
+		title=_("PO Limit Restriction"),
+		exc=POLimitExceededError
+	)
+
+def throw_monthly_limit_exceeded(po_amount, per_month_limit, monthly_usage):
+	"""Raise the Per Month limit error"""
+	frappe.throw(
+		_("Monthly PO Amount ({0}) exceeds your Per Month Limit ({1}). Your current monthly usage: {2}. This PO: {3}. Please request MD approval.").format(
+			frappe.format_value(monthly_usage + po_amount, dict(fieldtype="Currency")),
+			frappe.format_value(per_month_limit, dict(fieldtype="Currency")),
+			frappe.format_value(monthly_usage, dict(fieldtype="Currency")),
+			frappe.format_value(po_amount, dict(fieldtype="Currency"))
+		),
+		title=_("PO Limit Restriction"),
+		exc=POLimitExceededError
+	)
 
 def get_monthly_po_usage(user, company):
 	"""
 	Calculate total PO amount submitted by user in current month.
-	Sums up base_grand_total from all submitted POs this month.
+	Read from the user's PO Monthly Spend rollup row rather than summing Purchase Orders.
 	"""
-	from frappe.utils import get_first_day, get_last_day, today
-
-	today_date = getdate(today())
-	first_day = get_first_day(today_date)
-	last_day = get_last_day(today_date)
+	from po.po_limiter.spend import get_spend_name
 
-	# Sum of all submitted POs in current month
-	total = frappe.db.sql("""
-		SELECT SUM(base_grand_total)
-		FROM `tabPurchase Order`
-		WHERE owner = %s
-		AND company = %s
-		AND docstatus = 1
-		AND transaction_date BETWEEN %s AND %s
-	""", (user, company, first_day, last_day))[0][0] or 0
+	month = get_first_day(getdate(today()))
+	return flt(frappe.db.get_value("PO Monthly Spend", get_spend_name(user, company, month), "amount"))
 
-	return flt(total)
+def update_monthly_usage(limit_name, amount, posting_date=None):
+	"""
+	Add `amount` (negative on cancel) to the monthly_usage field in User PO Limit, never below 0.
+	Only POs dated in the current month count. A value left over from an earlier month is
+	reset in the same statement. `modified` is bumped so incremental exports pick the change up.
+	"""
+	month = get_first_day(getdate(today()))
+	if posting_date and get_first_day(getdate(posting_date)) != month:
+		return
 
-def update_monthly_usage(limit_name, new_usage):
-	"""Update the monthly_usage field in User PO Limit"""
-	frappe.db.set_value("User PO Limit", limit_name, "monthly_usage", new_usage)
+	frappe.db.sql("""
+		UPDATE `tabUser PO Limit`
+		SET monthly_usage = GREATEST(
+				IF(IFNULL(last_reset_date, '0001-01-01') < %(month)s, 0, monthly_usage) + %(amount)s, 0),
+			last_reset_date = IF(IFNULL(last_reset_date, '0001-01-01') < %(month)s, %(today)s, last_reset_date),
+			modified = %(modified)s
+		WHERE name = %(name)s
+	""", {"name": limit_name, "amount": amount, "month": month, "today": today(), "modified": now()})
 
 def update_monthly_usage_on_po_cancel(doc, method=None):
 	"""
@@ -177,19 +267,26 @@ def update_monthly_usage_on_po_cancel(doc, method=None):
 	if doc.docstatus != 2:  # Only on cancel
 		return
 
+	if is_replay(doc):
+		return
+
 	# Use the current logged-in user (session user)
 	user = frappe.session.user
 	company = doc.company
 	po_amount = flt(doc.base_grand_total)
 
-	user_limit = get_user_po_limit(user, company)
+	user_limit = get_user_po_limit(user, company, live=True)
 	if not user_limit:
 		return
 
-	current_usage = flt(user_limit.get("monthly_usage", 0))
-	new_usage = max(0, current_usage - po_amount)  # Ensure we don't go negative
+	if cint(user_limit.get("usage_shards")) > 0:
+		from po.po_limiter.usage_shards import release_usage
+
+		doc.flags.po_usage_sharded = True
+		release_usage(user_limit, get_first_day(getdate(doc.transaction_date)), po_amount)
+		return
 
-	update_monthly_usage(user_limit["name"], new_usage)
+	update_monthly_usage(user_limit["name"], -po_amount, doc.transaction_date)
 
 
 @frappe.whitelist()
@@ -204,12 +301,16 @@ def get_user_po_limit_status(user, company):
 		return {
 			"status": "Revoked",
 			"per_po_limit": 0,
-			"per_month_limit": 0
+			"per_month_limit": 0,
+			"per_quarter_limit": 0,
+			"per_year_limit": 0
 		}
 
 	return {
 		"status": limits.get("status", "Revoked"),
 		"per_po_limit": limits.get("per_po_limit", 0),
-		"per_month_limit": limits.get("per_month_limit", 0)
+		"per_month_limit": limits.get("per_month_limit", 0),
+		"per_quarter_limit": limits.get("per_quarter_limit", 0),
+		"per_year_limit": limits.get("per_year_limit", 0)
 	}
 
@@ -0,0 +1,33 @@
+// Copyright (c) 2026, Lassod
+// License: MIT
+
+frappe.query_reports['PO Spend Trend'] = {
+	filters: [
+		{
+			fieldname: 'company',
+			label: __('Company'),
+			fieldtype: 'Link',
+			options: 'Company'
+		},
+		{
+			fieldname: 'user',
+			label: __('User'),
+			fieldtype: 'Link',
+			options: 'User'
+		},
+		{
+			fieldname: 'from_date',
+			label: __('From Date'),
+			fieldtype: 'Date',
+			default: frappe.datetime.month_start(frappe.datetime.add_months(frappe.datetime.get_today(), -11)),
+			reqd: 1
+		},
+		{
+			fieldname: 'to_date',
+			label: __('To Date'),
+			fieldtype: 'Date',
+			default: frappe.datetime.get_today(),
+			reqd: 1
+		}
+	]
+};
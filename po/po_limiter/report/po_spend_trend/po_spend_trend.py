@@ -0,0 +1,92 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+import frappe
+from frappe import _
+from frappe.utils import add_months, flt, get_datetime, get_first_day, getdate, today
+
+@frappe.read_only()
+def execute(filters=None):
+	"""
+	Monthly spend vs limit per user and company, read from the PO Monthly Spend rollup.
+	Each month is compared with the Per Month Limit in effect at its end, from PO Limit Audit Log.
+	"""
+	filters = frappe._dict(filters or {})
+	return get_columns(), get_data(filters)
+
+def get_columns():
+	return [
+		{"fieldname": "user", "label": _("User"), "fieldtype": "Link", "options": "User", "width": 200},
+		{"fieldname": "company", "label": _("Company"), "fieldtype": "Link", "options": "Company", "width": 160},
+		{"fieldname": "month", "label": _("Month"), "fieldtype": "Date", "width": 110},
+		{"fieldname": "po_count", "label": _("POs"), "fieldtype": "Int", "width": 70},
+		{"fieldname": "amount", "label": _("Spend"), "fieldtype": "Currency", "width": 140},
+		{"fieldname": "per_month_limit", "label": _("Per Month Limit"), "fieldtype": "Currency", "width": 140},
+		{"fieldname": "utilization", "label": _("Utilization %"), "fieldtype": "Percent", "width": 110}
+	]
+
+def get_data(filters):
+	from_date = get_first_day(getdate(filters.from_date or add_months(today(), -11)))
+	to_date = getdate(filters.to_date or today())
+
+	values = {
+		"from_date": from_date,
+		"to_date": to_date,
+		"company": filters.company,
+		"user": filters.user
+	}
+
+	data = frappe.db.sql("""
+		SELECT s.user, s.company, s.month, s.po_count, s.amount, l.per_month_limit
+		FROM `tabPO Monthly Spend` s
+		LEFT JOIN `tabUser PO Limit` l
+			ON l.user = s.user AND l.company = s.company
+		WHERE s.month BETWEEN %(from_date)s AND %(to_date)s
+		{conditions}
+		ORDER BY s.user, s.company, s.month
+	""".format(conditions=get_conditions(filters, "s.")), values, as_dict=1)
+
+	changes = get_limit_changes(filters, values)
+
+	for row in data:
+		row.per_month_limit = get_limit_in_effect(changes.get((row.user, row.company)), row.month, row.per_month_limit)
+		limit = flt(row.per_month_limit)
+		row.utilization = flt(row.amount) / limit * 100 if limit > 0 else None
+
+	return data
+
+def get_conditions(filters, prefix=""):
+	conditions = ""
+	if filters.company:
+		conditions += f" AND {prefix}company = %(company)s"
+	if filters.user:
+		conditions += f" AND {prefix}user = %(user)s"
+	return conditions
+
+def get_limit_changes(filters, values):
+	"""Per Month Limit changes since from_date, oldest first, as {(user, company): [change]}"""
+	rows = frappe.db.sql("""
+		SELECT user, company, changed_on, old_per_month_limit, new_per_month_limit
+		FROM `tabPO Limit Audit Log`
+		WHERE changed_on >= %(from_date)s
+		AND old_per_month_limit != new_per_month_limit
+		{conditions}
+		ORDER BY changed_on
+	""".format(conditions=get_conditions(filters)), values, as_dict=1)
+
+	changes = {}
+	for row in rows:
+		changes.setdefault((row.user, row.company), []).append(row)
+	return changes
+
+def get_limit_in_effect(changes, month, current_limit):
+	"""
+	Per Month Limit at the end of `month`: the last change before then, else the value the first
+	later change replaced, else the current limit
+	"""
+	if not changes:
+		return current_limit
+
+	month_end = get_datetime(add_months(month, 1))
+	before = [change for change in changes if change.changed_on < month_end]
+	return before[-1].new_per_month_limit if before else changes[0].old_per_month_limit
@@ -0,0 +1,169 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+import hashlib
+
+import frappe
+from frappe.utils import flt, get_first_day, getdate, now
+
+from po.po_limiter.usage_ledger import get_entry_name, is_replay
+
+FOLD_JOB_ID = "po_limiter_fold_pending_spend"
+
+FOLD_BATCH_SIZE = 1000
+
+def get_spend_name(user, company, month):
+	"""Stable name for the (user, company, month) rollup row"""
+	key = "|".join([user, company, str(month)])
+	return hashlib.md5(key.encode()).hexdigest()[:16]
+
+def update_spend_on_submit(doc, method=None):
+	"""Add a submitted PO to its owner's monthly spend rollup"""
+	if is_replay(doc):
+		return
+	if doc.flags.po_usage_sharded:
+		defer_spend(doc, "Submit")
+		return
+	add_spend(doc.owner, doc.company, doc.transaction_date, flt(doc.base_grand_total), 1)
+
+def update_spend_on_cancel(doc, method=None):
+	"""Remove a cancelled PO from its owner's monthly spend rollup"""
+	if is_replay(doc):
+		return
+	if doc.flags.po_usage_sharded:
+		defer_spend(doc, "Cancel")
+		return
+	add_spend(doc.owner, doc.company, doc.transaction_date, -flt(doc.base_grand_total), -1)
+
+def defer_spend(doc, transition):
+	"""
+	Leave a PO of a sharded limit for fold_pending_spend instead of upserting the rollup row.
+	The rollup row is shared by all of the user's submits in the month, so writing it here would
+	serialize them on its lock again. Only the PO's own ledger entry is touched.
+	"""
+	frappe.db.sql("""
+		UPDATE `tabPO Usage Ledger Entry`
+		SET pending_rollup = 1
+		WHERE name = %s
+	""", get_entry_name(doc.name, transition))
+
+	frappe.enqueue("po.po_limiter.spend.fold_pending_spend",
+		queue="short",
+		job_id=FOLD_JOB_ID,
+		deduplicate=True,
+		enqueue_after_commit=True
+	)
+
+def fold_pending_spend():
+	"""
+	Add pending ledger entries to PO Monthly Spend, one upsert per (user, company, month).
+	Runs from the queue after sharded submits and on the scheduler, which picks up anything missed.
+	"""
+	while True:
+		entries = frappe.db.sql("""
+			SELECT name, user, company, month, amount, transition
+			FROM `tabPO Usage Ledger Entry`
+			WHERE pending_rollup = 1
+			LIMIT %s
+			FOR UPDATE
+		""", FOLD_BATCH_SIZE, as_dict=1)
+		if not entries:
+			return
+
+		totals = {}
+		for entry in entries:
+			amount, po_count = totals.get((entry.user, entry.company, entry.month), (0, 0))
+			totals[(entry.user, entry.company, entry.month)] = (
+				amount + flt(entry.amount),
+				po_count + (1 if entry.transition == "Submit" else -1)
+			)
+
+		for (user, company, month), (amount, po_count) in totals.items():
+			add_spend(user, company, month, amount, po_count)
+
+		frappe.db.sql("""
+			UPDATE `tabPO Usage Ledger Entry`
+			SET pending_rollup = 0
+			WHERE name IN %s
+		""", (tuple(entry.name for entry in entries),))
+		frappe.db.commit()
+
+def get_month_spend(user, company, month):
+	"""A user's spend for a month: the rollup row plus ledger entries not folded into it yet"""
+	return flt(frappe.db.sql("""
+		SELECT SUM(amount)
+		FROM (
+			SELECT amount
+			FROM `tabPO Monthly Spend`
+			WHERE name = %(name)s
+			UNION ALL
+			SELECT amount
+			FROM `tabPO Usage Ledger Entry`
+			WHERE user = %(user)s
+			AND company = %(company)s
+			AND month = %(month)s
+			AND pending_rollup = 1
+		) AS spend
+	""", {
+		"name": get_spend_name(user, company, month),
+		"user": user,
+		"company": company,
+		"month": month
+	})[0][0])
+
+def add_spend(user, company, date, amount, po_count):
+	"""
+	Add amount and PO count to the PO Monthly Spend row for the month of `date`.
+	Creates the row if it doesn't exist yet, in a single statement.
+	"""
+	month = get_first_day(getdate(date))
+	timestamp = now()
+
+	frappe.db.sql("""
+		INSERT INTO `tabPO Monthly Spend`
+			(name, creation, modified, modified_by, owner, docstatus, idx,
+			user, company, month, amount, po_count)
+		VALUES
+			(%(name)s, %(timestamp)s, %(timestamp)s, %(actor)s, %(actor)s, 0, 0,
+			%(user)s, %(company)s, %(month)s, %(amount)s, %(po_count)s)
+		ON DUPLICATE KEY UPDATE
+			amount = amount + VALUES(amount),
+			po_count = po_count + VALUES(po_count),
+			modified = VALUES(modified)
+	""", {
+		"name": get_spend_name(user, company, month),
+		"timestamp": timestamp,
+		"actor": frappe.session.user,
+		"user": user,
+		"company": company,
+		"month": month,
+		"amount": amount,
+		"po_count": po_count
+	})
+
+def rebuild_monthly_spend():
+	"""
+	Rebuild the PO Monthly Spend rollup from submitted Purchase Orders.
+	Used for the one-time backfill; safe to run again to repair drift.
+	Pending ledger entries are counted by the rebuild, so they are no longer pending after it.
+	"""
+	frappe.db.sql("DELETE FROM `tabPO Monthly Spend`")
+	frappe.db.sql("UPDATE `tabPO Usage Ledger Entry` SET pending_rollup = 0 WHERE pending_rollup = 1")
+	frappe.db.sql("""
+		INSERT INTO `tabPO Monthly Spend`
+			(name, creation, modified, modified_by, owner, docstatus, idx,
+			user, company, month, amount, po_count)
+		SELECT
+			LEFT(MD5(CONCAT_WS('|', owner, company, month)), 16),
+			NOW(), NOW(), 'Administrator', 'Administrator', 0, 0,
+			owner, company, month, amount, po_count
+		FROM (
+			SELECT owner, company,
+				DATE_FORMAT(transaction_date, '%Y-%m-01') AS month,
+				SUM(base_grand_total) AS amount,
+				COUNT(*) AS po_count
+			FROM `tabPurchase Order`
+			WHERE docstatus = 1
+			GROUP BY owner, company, DATE_FORMAT(transaction_date, '%Y-%m-01')
+		) AS spend
+	""")
@@ -0,0 +1,239 @@
+# Copyright (c) 2026, Ejiroghene Dominic and Contributors
+# See license.txt
+
+"""
+SQL query-count regression tests for every limiter hook and whitelisted endpoint.
+
+Each path is run against synthetic data of several sizes and must issue the same
+number of statements at every size. A path whose count grows with the data (an
+N+1 loop, a per-row lookup) fails with the recorded statements in the message.
+Paths served from a cache are also measured with that cache cleared.
+With `po_record_query_counts` set in site config, the counts and statements of the
+run are written to `po_query_counts.json` in the site folder.
+"""
+
+import itertools
+import json
+from contextlib import contextmanager
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import get_first_day, today
+
+from po.po_limiter import limit_snapshot, po_validation, spend, usage_ledger, user_hooks
+from po.po_limiter.page.po_limiter import po_limiter
+from po.po_limiter.testing import insert_rows
+
+# Number of synthetic users / limits / requests each path is measured against
+DATA_SIZES = (1, 10, 50)
+
+TEST_USER_PREFIX = "_test_po_qc_"
+
+@contextmanager
+def record_queries():
+	"""Record every statement sent through frappe.db.sql while the block runs"""
+	queries = []
+	db_class = frappe.db.__class__
+	orig_sql = db_class.sql
+
+	def _sql(self, query, *args, **kwargs):
+		queries.append(str(query).strip())
+		return orig_sql(self, query, *args, **kwargs)
+
+	db_class.sql = _sql
+	try:
+		yield queries
+	finally:
+		db_class.sql = orig_sql
+
+
+class TestQueryCounts(FrappeTestCase):
+	query_counts = {}
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.company = frappe.db.get_value("Company", {}, "name")
+		cls.user_counter = itertools.count()
+		cls.data_size = 0
+
+	@classmethod
+	def tearDownClass(cls):
+		if frappe.conf.get("po_record_query_counts"):
+			with open(frappe.get_site_path("po_query_counts.json"), "w") as f:
+				json.dump(cls.query_counts, f, indent=1, sort_keys=True)
+		super().tearDownClass()
+
+	def setUp(self):
+		if not self.company:
+			self.skipTest("No Company available to build limiter test data")
+
+		# Every test grows the data from scratch
+		frappe.db.savepoint("po_query_counts")
+		self.__class__.data_size = 0
+
+		frappe.set_user("Administrator")
+		if not frappe.db.exists("User PO Limit", {"user": "Administrator", "company": self.company}):
+			frappe.get_doc({
+				"doctype": "User PO Limit",
+				"user": "Administrator",
+				"company": self.company,
+				"status": "Active",
+				"per_po_limit": 10 ** 9,
+				"per_month_limit": 10 ** 12,
+				"last_reset_date": today()
+			}).insert(ignore_permissions=True)
+
+	def tearDown(self):
+		frappe.db.rollback(save_point="po_query_counts")
+
+	def grow_data(self, size):
+		"""Add synthetic users, roles, limits, requests and spend until `size` of each exist"""
+		cls = self.__class__
+		if size <= cls.data_size:
+			return
+
+		users = [f"{TEST_USER_PREFIX}{i}@example.com" for i in range(cls.data_size, size)]
+
+		insert_rows("User", ["email", "first_name", "full_name", "enabled", "user_type"],
+			[(u, u, u, u, 1, "System User") for u in users])
+		insert_rows("Has Role", ["parent", "parenttype", "parentfield", "role"],
+			[(None, u, "User", "roles", "Purchase Order Creator") for u in users])
+		insert_rows("User PO Limit", ["user", "company", "status", "per_po_limit", "per_month_limit",
+				"monthly_usage", "last_reset_date"],
+			[(None, u, self.company, "Active", 1000, 10000, 0, today()) for u in users])
+		insert_rows("PO Limit Increase Request", ["naming_series", "user", "company", "requested_per_po_limit",
+				"requested_per_month_limit", "reason", "status", "docstatus"],
+			[(None, "PO-LIR-.YYYY.-", u, self.company, 2000, 20000, "Query count test", "Pending Approval", 1)
+				for u in users])
+		for u in users:
+			spend.add_spend(u, self.company, today(), 100, 1)
+
+		cls.data_size = size
+
+	def make_purchase_order(self, docstatus=1):
+		"""A stand-in Purchase Order with the fields the limiter hooks read"""
+		return frappe._dict({
+			"doctype": "Purchase Order",
+			"name": f"_Test PO QC {next(self.user_counter)}",
+			"docstatus": docstatus,
+			"company": self.company,
+			"owner": frappe.session.user,
+			"transaction_date": today(),
+			"base_grand_total": 100,
+			"flags": frappe._dict()
+		})
+
+	def make_user(self):
+		"""A freshly inserted User, as passed to the after_insert hook"""
+		name = f"{TEST_USER_PREFIX}new_{next(self.user_counter)}@example.com"
+		insert_rows("User", ["email", "first_name", "enabled", "user_type"], [(name, name, name, 1, "System User")])
+		return frappe._dict({"doctype": "User", "name": name})
+
+	def assertConstantQueryCount(self, label, fn, prepare=None, clear_cache=None):
+		"""
+		Run `fn` at every data size and fail if its query count changes.
+		`prepare` builds fn's arguments outside of the recorded block. `clear_cache` drops the
+		caches the path reads, so it is measured once more with them cold, as "<label>[cold]".
+		"""
+		self.check_query_count(label, fn, prepare)
+		if clear_cache:
+			self.check_query_count(f"{label}[cold]", fn, prepare, clear_cache)
+
+	def check_query_count(self, label, fn, prepare=None, clear_cache=None):
+		"""Record fn's statements at every data size and assert that their count is constant"""
+		recorded = {}
+		for size in DATA_SIZES:
+			self.grow_data(size)
+			# Warm metadata and the path's caches so only its own queries are counted
+			fn(*(prepare() if prepare else ()))
+			if clear_cache:
+				clear_cache()
+			args = prepare() if prepare else ()
+			with record_queries() as queries:
+				fn(*args)
+			recorded[size] = queries
+
+		self.query_counts[label] = {
+			str(size): {"count": len(queries), "statements": queries}
+			for size, queries in recorded.items()
+		}
+
+		baseline = len(recorded[DATA_SIZES[0]])
+		for size, queries in recorded.items():
+			self.assertEqual(len(queries), baseline,
+				msg="{0} issued {1} queries with {2} rows but {3} with {4} rows:\n\n{5}".format(
+					label, len(queries), size, baseline, DATA_SIZES[0], "\n\n".join(queries)))
+
+	def test_validate_po_limits_on_validate(self):
+		self.assertConstantQueryCount("validate_po_limits[validate]",
+			lambda doc: po_validation.validate_po_limits(doc, "validate"),
+			prepare=lambda: (self.make_purchase_order(),))
+
+	def test_validate_po_limits_on_submit(self):
+		self.assertConstantQueryCount("validate_po_limits[on_submit]",
+			lambda doc: po_validation.validate_po_limits(doc, "on_submit"),
+			prepare=lambda: (self.make_purchase_order(),))
+
+	def test_update_monthly_usage_on_po_cancel(self):
+		self.assertConstantQueryCount("update_monthly_usage_on_po_cancel",
+			lambda doc: po_validation.update_monthly_usage_on_po_cancel(doc, "on_cancel"),
+			prepare=lambda: (self.make_purchase_order(docstatus=2),))
+
+	def test_record_submit(self):
+		self.assertConstantQueryCount("record_submit",
+			lambda doc: usage_ledger.record_submit(doc, "on_submit"),
+			prepare=lambda: (self.make_purchase_order(),))
+
+	def test_update_spend_on_submit(self):
+		self.assertConstantQueryCount("update_spend_on_submit",
+			lambda doc: spend.update_spend_on_submit(doc, "on_submit"),
+			prepare=lambda: (self.make_purchase_order(),))
+
+	def test_update_spend_on_cancel(self):
+		self.assertConstantQueryCount("update_spend_on_cancel",
+			lambda doc: spend.update_spend_on_cancel(doc, "on_cancel"),
+			prepare=lambda: (self.make_purchase_order(docstatus=2),))
+
+	def test_create_default_po_limit(self):
+		self.assertConstantQueryCount("create_default_po_limit",
+			lambda doc: user_hooks.create_default_po_limit(doc, "after_insert"),
+			prepare=lambda: (self.make_user(),))
+
+	def test_provision_users(self):
+		self.assertConstantQueryCount("provision_users",
+			lambda doc: user_hooks.provision_users([doc.name], [self.company]),
+			prepare=lambda: (self.make_user(),))
+
+	def test_get_user_po_limit_status(self):
+		self.assertConstantQueryCount("get_user_po_limit_status",
+			lambda: po_validation.get_user_po_limit_status(frappe.session.user, self.company),
+			clear_cache=lambda: limit_snapshot.clear_limit_snapshot(frappe.session.user))
+
+	def test_build_limit_snapshot(self):
+		self.assertConstantQueryCount("build_limit_snapshot",
+			lambda: limit_snapshot.build_snapshot(f"{TEST_USER_PREFIX}0@example.com", get_first_day(today())))
+
+	def test_get_purchase_users(self):
+		self.assertConstantQueryCount("get_purchase_users", po_limiter.get_purchase_users)
+
+	def test_get_all_user_limits(self):
+		self.assertConstantQueryCount("get_all_user_limits", po_limiter.get_all_user_limits)
+
+	def test_get_pending_limit_requests(self):
+		self.assertConstantQueryCount("get_pending_limit_requests", po_limiter.get_pending_limit_requests)
+
+	def test_get_user_limit_details(self):
+		self.assertConstantQueryCount("get_user_limit_details",
+			lambda: po_limiter.get_user_limit_details(f"{TEST_USER_PREFIX}0@example.com", self.company))
+
+	def test_has_po_create_permission(self):
+		user = f"{TEST_USER_PREFIX}0@example.com"
+		self.assertConstantQueryCount("has_po_create_permission",
+			lambda: po_limiter.has_po_create_permission(user),
+			clear_cache=lambda: frappe.clear_cache(user=user))
+
+	def test_update_user_limit(self):
+		self.assertConstantQueryCount("update_user_limit",
+			lambda: po_limiter.update_user_limit(f"{TEST_USER_PREFIX}0@example.com", self.company,
+				1000, 10000, "Active"))
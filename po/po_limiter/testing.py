@@ -0,0 +1,24 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+"""Helpers shared by the limiter tests"""
+
+import frappe
+from frappe.utils import now
+
+STANDARD_FIELDS = ["name", "creation", "modified", "owner", "modified_by"]
+
+def insert_rows(doctype, fields, rows):
+	"""
+	Bulk insert test rows given as (name, *values) for `fields`, with the standard columns filled in.
+	A name of None gets a random hash.
+	"""
+	timestamp = now()
+	frappe.db.bulk_insert(doctype,
+		fields=STANDARD_FIELDS + fields,
+		values=[
+			(name or frappe.generate_hash(length=10), timestamp, timestamp, "Administrator", "Administrator")
+				+ tuple(values)
+			for name, *values in rows
+		]
+	)
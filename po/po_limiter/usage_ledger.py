@@ -0,0 +1,59 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+"""
+Idempotent usage accounting for Purchase Orders.
+
+Every submit and cancel claims a PO Usage Ledger Entry keyed by the Purchase Order name and
+the transition. The claim is a single INSERT IGNORE against a unique key, so it succeeds
+exactly once per PO and transition. The first hook of each event records whether the claim
+was new in `doc.flags.po_usage_replay`, and the limit and rollup hooks after it only change
+usage on a new claim. A replayed submit or cancel is therefore a no-op.
+"""
+
+import frappe
+from frappe.utils import flt, get_first_day, getdate, now
+
+def get_entry_name(po_name, transition):
+	"""Ledger entry name for a Purchase Order transition"""
+	return f"{po_name}-{transition}"
+
+def record_submit(doc, method=None):
+	"""Claim the Submit entry of a Purchase Order; first on_submit hook"""
+	doc.flags.po_usage_replay = not record_usage(doc, "Submit", flt(doc.base_grand_total))
+
+def record_cancel(doc, method=None):
+	"""Claim the Cancel entry of a Purchase Order; first on_cancel hook"""
+	doc.flags.po_usage_replay = not record_usage(doc, "Cancel", -flt(doc.base_grand_total))
+
+def record_usage(doc, transition, amount):
+	"""
+	Insert the ledger entry for a Purchase Order transition unless it exists.
+
+	Returns:
+		True if the entry was new, False if this transition was already recorded
+	"""
+	timestamp = now()
+	frappe.db.sql("""
+		INSERT IGNORE INTO `tabPO Usage Ledger Entry`
+			(name, creation, modified, modified_by, owner, docstatus, idx,
+			purchase_order, transition, user, company, month, amount)
+		VALUES
+			(%(name)s, %(timestamp)s, %(timestamp)s, %(actor)s, %(actor)s, 0, 0,
+			%(purchase_order)s, %(transition)s, %(user)s, %(company)s, %(month)s, %(amount)s)
+	""", {
+		"name": get_entry_name(doc.name, transition),
+		"timestamp": timestamp,
+		"actor": frappe.session.user,
+		"purchase_order": doc.name,
+		"transition": transition,
+		"user": doc.owner,
+		"company": doc.company,
+		"month": get_first_day(getdate(doc.transaction_date)),
+		"amount": amount
+	})
+	return frappe.db.sql("SELECT ROW_COUNT()")[0][0] == 1
+
+def is_replay(doc):
+	"""True if the current submit or cancel was already recorded by an earlier run"""
+	return bool(doc.flags and doc.flags.po_usage_replay)
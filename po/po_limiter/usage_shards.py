@@ -0,0 +1,174 @@
+# Copyright (c) 2026, Lassod
+# License: MIT
+
+"""
+Sharded monthly usage counters for high-volume users.
+
+When a User PO Limit has `usage_shards` = N > 0, monthly usage is kept in N PO Usage Shard
+rows per period instead of the single `monthly_usage` column. Each shard may hold at most
+per_month_limit / N (its reserved allocation). Parallel submits therefore lock different rows,
+and because every shard stays within its allocation the sum can never exceed the limit.
+A submit that doesn't fit in any single shard takes the slow path. That path locks all shards,
+checks the total and rebalances the amounts across the shards.
+A period's shards start from the month's spend so far, so turning sharding on mid-month keeps
+the usage already submitted.
+"""
+
+import hashlib
+import random
+
+import frappe
+from frappe.utils import cint, flt, now
+
+def get_shard_name(limit_name, period, shard):
+	"""Stable name for one shard row"""
+	key = "|".join([limit_name, str(period), str(shard)])
+	return hashlib.md5(key.encode()).hexdigest()[:16]
+
+def get_shards(limit_name, period, for_update=False):
+	"""Shard rows of a limit for a period as {name: amount}"""
+	rows = frappe.db.sql("""
+		SELECT name, amount
+		FROM `tabPO Usage Shard`
+		WHERE user_po_limit = %s AND period = %s
+		ORDER BY shard
+		{lock}
+	""".format(lock="FOR UPDATE" if for_update else ""), (limit_name, period))
+	return {name: flt(amount) for name, amount in rows}
+
+def get_usage(limit_name, period):
+	"""Total usage of a sharded limit for a period"""
+	return sum(get_shards(limit_name, period).values())
+
+def get_usage_for_limits(limit_names, period):
+	"""Total sharded usage for several limits in one query, as {limit_name: amount}"""
+	if not limit_names:
+		return {}
+
+	return dict(frappe.db.sql("""
+		SELECT user_po_limit, SUM(amount)
+		FROM `tabPO Usage Shard`
+		WHERE user_po_limit IN %s AND period = %s
+		GROUP BY user_po_limit
+	""", (tuple(limit_names), period)))
+
+def get_active_shard_names(limit_name, period, shard_count):
+	"""Names of the shards numbered below the limit's current shard count"""
+	return [get_shard_name(limit_name, period, i) for i in range(shard_count)]
+
+def ensure_shards(user_limit, period):
+	"""
+	Create any missing active shard rows for the period.
+	When the period has no shards yet, they are seeded with the month's spend from the rollup.
+	"""
+	limit_name = user_limit["name"]
+	shard_count = cint(user_limit.get("usage_shards"))
+	shards = get_shards(limit_name, period)
+	if all(name in shards for name in get_active_shard_names(limit_name, period, shard_count)):
+		return shards
+
+	amounts = [0] * shard_count
+	if not shards:
+		from po.po_limiter.spend import get_month_spend
+
+		spent = get_month_spend(user_limit["user"], user_limit["company"], period)
+		amounts = spread(spent, shard_count, flt(user_limit.get("per_month_limit")) / shard_count)
+
+	timestamp = now()
+	frappe.db.bulk_insert("PO Usage Shard",
+		fields=["name", "creation", "modified", "owner", "modified_by",
+			"user_po_limit", "period", "shard", "amount"],
+		values=[
+			(get_shard_name(limit_name, period, i), timestamp, timestamp, "Administrator", "Administrator",
+				limit_name, period, i, amounts[i])
+			for i in range(shard_count)
+		],
+		ignore_duplicates=True
+	)
+	return get_shards(limit_name, period)
+
+def spread(total, shard_count, allocation):
+	"""Split `total` over the shards within `allocation`; anything over the limit stays on the last shard"""
+	amounts = []
+	remaining = max(flt(total), 0)
+	for i in range(shard_count):
+		share = remaining if i == shard_count - 1 else min(allocation, remaining)
+		amounts.append(share)
+		remaining -= share
+	return amounts
+
+def reserve_usage(user_limit, period, amount):
+	"""
+	Add `amount` to one of the limit's shards if it fits under per_month_limit.
+
+	Returns:
+		(reserved, usage): whether the amount was recorded, and the usage seen before it
+	"""
+	limit_name = user_limit["name"]
+	per_month_limit = flt(user_limit.get("per_month_limit"))
+	shard_count = cint(user_limit.get("usage_shards"))
+	allocation = per_month_limit / shard_count
+	active = get_active_shard_names(limit_name, period, shard_count)
+
+	shards = ensure_shards(user_limit, period)
+	usage = sum(shards.values())
+
+	# The fast path is only safe while every active shard is within its allocation and shards
+	# left over from a higher shard count are empty. A changed limit or shard count sends the
+	# next submit through the slow path, which restores that.
+	if usage + amount <= per_month_limit and is_balanced(shards, active, allocation):
+		# Conditional increment on one random active shard with room left
+		candidates = [name for name in active if shards[name] + amount <= allocation]
+		for name in random.sample(candidates, len(candidates)):
+			if increment_shard(name, amount, allocation):
+				return True, usage
+
+	# Slow path: lock every shard, check the real total and spread it back within allocations
+	shards = get_shards(limit_name, period, for_update=True)
+	usage = sum(shards.values())
+	if usage + amount > per_month_limit:
+		return False, usage
+
+	rebalance(shards, active, usage + amount, allocation)
+	return True, usage
+
+def is_balanced(shards, active, allocation):
+	"""True if active shards are within their allocation and all other shards are empty"""
+	return all(
+		amount <= allocation if name in active else amount == 0
+		for name, amount in shards.items()
+	)
+
+def increment_shard(name, amount, allocation):
+	"""Add `amount` to a shard unless that takes it over `allocation`; True if it was added"""
+	frappe.db.sql("""
+		UPDATE `tabPO Usage Shard`
+		SET amount = amount + %(amount)s, modified = %(modified)s
+		WHERE name = %(name)s AND amount + %(amount)s <= %(allocation)s
+	""", {"name": name, "amount": amount, "allocation": allocation, "modified": now()})
+	return frappe.db.sql("SELECT ROW_COUNT()")[0][0] == 1
+
+def release_usage(user_limit, period, amount):
+	"""
+	Subtract a cancelled amount from the limit's shards, largest first.
+	The shards are created first if needed, so a PO submitted before sharding was turned on is
+	released from the seeded usage.
+	"""
+	ensure_shards(user_limit, period)
+	shards = get_shards(user_limit["name"], period, for_update=True)
+	remaining = flt(amount)
+
+	for name, used in sorted(shards.items(), key=lambda s: s[1], reverse=True):
+		if remaining <= 0:
+			break
+		taken = min(used, remaining)
+		frappe.db.set_value("PO Usage Shard", name, "amount", used - taken)
+		remaining -= taken
+
+def rebalance(shards, active, total, allocation):
+	"""Write `total` across the active locked shards within `allocation` and empty all others"""
+	for name in shards:
+		share = min(allocation, total) if name in active else 0
+		if share != shards[name]:
+			frappe.db.set_value("PO Usage Shard", name, "amount", share)
+		total -= share
@@ -2,34 +2,98 @@
 # License: MIT
 
 import frappe
+from frappe.utils import now, today
+
+from po.po_limiter.limit_snapshot import clear_limit_snapshot
+
+# Redis set of users waiting for their default limits
+PENDING_USERS_KEY = "po_limit_pending_users"
+
+PROVISION_JOB_ID = "po_limiter_provision_users"
+
+BATCH_SIZE = 500
 
 def create_default_po_limit(doc, method=None):
 	"""
-	Create default PO limit (zero) for new users.
+	Queue default PO limits (zero) for a new user.
 	This is called via User after_insert hook.
+
+	The user is added to a pending set and a single deduplicated background job creates the
+	rows for everyone queued, so bulk user imports don't insert limits one by one. Until the
+	job runs, the user has no limit and validation treats them as Revoked.
+
+	The user is only queued once the User insert has committed, so a run can never see the
+	queued name before the User row is visible.
 	"""
-	# Get all companies
-	companies = frappe.get_all("Company", filters={"enabled": 1}, pluck="name")
+	frappe.db.after_commit.add(lambda: frappe.cache().sadd(PENDING_USERS_KEY, doc.name))
+	frappe.enqueue("po.po_limiter.user_hooks.provision_pending_users",
+		queue="short",
+		job_id=PROVISION_JOB_ID,
+		deduplicate=True,
+		enqueue_after_commit=True
+	)
 
+def provision_pending_users():
+	"""
+	Create default limits for every queued user, BATCH_SIZE users per insert.
+	Runs from the queue and on the scheduler, which picks up users queued while a run was finishing.
+	Users are only removed from the queue once provisioned; anyone else stays queued for a later run.
+	"""
+	cache = frappe.cache()
+	companies = frappe.get_all("Company", filters={"enabled": 1}, pluck="name")
 	if not companies:
 		return
 
-	# Create zero limit records for each company
-	for company in companies:
-		# Check if already exists (might be created by other means)
-		exists = frappe.db.exists("User PO Limit", {
-			"user": doc.name,
-			"company": company
-		})
-
-		if not exists:
-			frappe.get_doc({
-				"doctype": "User PO Limit",
-				"user": doc.name,
-				"company": company,
-				"status": "Revoked",
-				"per_po_limit": 0,
-				"per_month_limit": 0,
-				"monthly_usage": 0,
-				"last_reset_date": frappe.utils.today()
-			}).insert(ignore_permissions=True)
+	seen = set()
+	while True:
+		queued = {frappe.safe_decode(user) for user in cache.smembers(PENDING_USERS_KEY) or ()}
+		pending = sorted(queued - seen)
+		if not pending:
+			return
+		seen.update(pending)
+
+		for start in range(0, len(pending), BATCH_SIZE):
+			provisioned = provision_users(pending[start:start + BATCH_SIZE], companies)
+			frappe.db.commit()
+			if provisioned:
+				cache.srem(PENDING_USERS_KEY, *provisioned)
+
+def provision_users(users, companies):
+	"""
+	Insert Revoked, zero limits for every missing (user, company) pair in one statement.
+
+	Returns:
+		The users that now have their limits; users not found are left out
+	"""
+	users = frappe.get_all("User", filters={"name": ["in", users]}, pluck="name")
+	if not users:
+		return []
+
+	existing = set(frappe.db.sql("""
+		SELECT user, company
+		FROM `tabUser PO Limit`
+		WHERE user IN %s
+	""", (tuple(users),)))
+
+	timestamp = now()
+	values = [
+		(frappe.generate_hash(length=10), timestamp, timestamp, "Administrator", "Administrator",
+			user, company, "Revoked", 0, 0, 0, today())
+		for user in users
+		for company in companies
+		if (user, company) not in existing
+	]
+	if not values:
+		return users
+
+	frappe.db.bulk_insert("User PO Limit",
+		fields=["name", "creation", "modified", "owner", "modified_by",
+			"user", "company", "status", "per_po_limit", "per_month_limit", "monthly_usage", "last_reset_date"],
+		values=values
+	)
+	clear_limit_snapshot(users)
+	return users
+
+def forget_pending_user(doc, method=None):
+	"""Drop a deleted user from the provisioning queue; User on_trash hook"""
+	frappe.cache().srem(PENDING_USERS_KEY, doc.name)